@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Garden-wide adjacency between squares
+
+Squares are numbered row by row in global coordinates across the whole
+garden, and the graph is kept in compressed sparse row form: the neighbours
+of square i are indices[indptr[i]:indptr[i + 1]].
+"""
+
+from functools import lru_cache
+import numpy as np
+
+# The eight squares around a square, in the same order as
+# Box.get_coord_neighbours
+OFFSETS = [
+    (-1, -1),
+    (0, -1),
+    (1, -1),
+    (-1, 0),
+    (1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1)
+]
+
+
+class AdjacencyGraph:
+    """
+    Neighbours of every square in a garden of north x west boxes
+
+    With cross_box set, squares on the edges of boxes that touch are
+    neighbours, otherwise neighbours stop at the edge of each box.
+    """
+
+    def __init__(self, north, west, box_north=4, box_west=4, cross_box=True):
+        self.rows = north * box_north
+        self.cols = west * box_west
+        self.box_north = box_north
+        self.box_west = box_west
+        self.cross_box = cross_box
+        self.footprints = {}
+        self.edges = {}
+
+        squares = np.arange(self.rows * self.cols)
+        rows, cols = np.divmod(squares, self.cols)
+
+        neighbours = []
+        valid = []
+        for offset in OFFSETS:
+            n_rows = rows + offset[0]
+            n_cols = cols + offset[1]
+            mask = ((n_rows >= 0) & (n_rows < self.rows) &
+                    (n_cols >= 0) & (n_cols < self.cols))
+            if not cross_box:
+                mask &= ((n_rows // box_north == rows // box_north) &
+                         (n_cols // box_west == cols // box_west))
+            neighbours.append(n_rows * self.cols + n_cols)
+            valid.append(mask)
+
+        # One row per square, one column per offset
+        neighbours = np.stack(neighbours, axis=1)
+        valid = np.stack(valid, axis=1)
+
+        counts = valid.sum(axis=1)
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int32)
+        self.indices = neighbours[valid].astype(np.int32)
+        self.sources = np.repeat(squares, counts).astype(np.int32)
+
+        # Graphs are shared between gardens of the same shape
+        for array in (self.indptr, self.indices, self.sources):
+            array.flags.writeable = False
+
+    def get_index(self, row, col):
+        """
+        Gets the index of the square at global coordinates
+        """
+        return row * self.cols + col
+
+    def get_neighbours(self, index):
+        """
+        Gets the indices of the squares around a square
+        """
+        return self.indices[self.indptr[index]:self.indptr[index + 1]]
+
+    def get_footprint_neighbours(self, origin, dimensions):
+        """
+        Gets the indices of the squares connected to a footprint, not
+        including the footprint itself
+        """
+        key = (origin, dimensions)
+        if key not in self.footprints:
+            own = np.array([self.get_index(origin[0] + i, origin[1] + j)
+                            for i in range(dimensions[0])
+                            for j in range(dimensions[1])])
+            around = np.concatenate([self.get_neighbours(i) for i in own])
+            self.footprints[key] = np.setdiff1d(around, own)
+        return self.footprints[key]
+
+    def get_footprint_edges(self, origin, dimensions):
+        """
+        Gets the indices of the squares connected to a footprint, once for
+        each square of the footprint they touch
+        """
+        key = (origin, dimensions)
+        if key not in self.edges:
+            own = np.array([self.get_index(origin[0] + i, origin[1] + j)
+                            for i in range(dimensions[0])
+                            for j in range(dimensions[1])])
+            around = np.concatenate([self.get_neighbours(i) for i in own])
+            self.edges[key] = around[~np.isin(around, own)]
+        return self.edges[key]
+
+    def score_footprint(self, codes, relation, plant, origin, dimensions):
+        """
+        Gets how much planting an empty footprint with the plant changes the
+        score of the layout, see score
+        """
+        others = codes[self.get_footprint_edges(origin, dimensions)]
+        others = others[others >= 0]
+        return int(relation[plant, others].sum() +
+                   relation[others, plant].sum())
+
+    def rank_origins(self, codes, relation, plant, origins, dimensions):
+        """
+        Ranks a plant at each origin by its neighbours: relation[plant, other]
+        summed over every planted square around the footprint
+
+        codes holds the plant code of every square, -1 where it's empty.
+        """
+        around = [self.get_footprint_neighbours(origin, dimensions)
+                  for origin in origins]
+        segments = np.repeat(np.arange(len(origins)),
+                             [len(a) for a in around])
+        others = codes[np.concatenate(around)]
+        weights = np.where(others >= 0, relation[plant, others], 0)
+        return np.bincount(segments, weights=weights,
+                           minlength=len(origins)).astype(int)
+
+    def score(self, codes, relation, groups=None):
+        """
+        Scores a whole layout: relation[a, b] summed over every pair of
+        planted neighbours, in both directions
+
+        If groups is given, neighbours in the same group (>= 0), such as the
+        squares of one large plant, aren't scored against each other.
+        """
+        sources = codes[self.sources]
+        targets = codes[self.indices]
+        planted = (sources >= 0) & (targets >= 0)
+        if groups is not None:
+            same = groups[self.sources]
+            planted &= (same < 0) | (same != groups[self.indices])
+        return int(relation[sources[planted], targets[planted]].sum())
+
+
+@lru_cache(maxsize=32)
+def get_graph(north, west, box_north=4, box_west=4, cross_box=True):
+    """
+    Gets the adjacency graph for a garden shape, building it only once
+    """
+    return AdjacencyGraph(north, west, box_north, box_west, cross_box)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Generates garden layouts without blocking an asyncio event loop
+"""
+
+import asyncio
+from collections import namedtuple
+import threading
+import time
+from garden import Garden, GardenLayoutException, GardenLayoutCancelled
+
+# The garden as far as generation got. If it was stopped early, complete is
+# False and reason says why.
+LayoutResult = namedtuple('LayoutResult', ['garden', 'complete', 'reason'])
+
+
+def run_generation(garden, preferences):
+    """
+    Generates the layout, returning why it stopped early or None if it
+    finished
+
+    Preferences rejected before anything is placed raise a
+    GardenLayoutException, as there's no partial layout to return.
+    """
+    try:
+        garden.generate(preferences)
+    except GardenLayoutCancelled as error:
+        return str(error)
+    except GardenLayoutException as error:
+        if garden.phase is None:
+            raise
+        return str(error)
+    return None
+
+
+async def generate_layout(library, north, west, preferences, cross_box=False,
+                          progress=None, timeout=None, cancel=None):
+    """
+    Generates a garden layout in the loop's default executor
+
+    progress is called on the event loop with a Progress after each
+    placement. Generation stops between placements once timeout seconds
+    have passed or the cancel event is set, and the partial layout is
+    returned. The partial layout is also returned if placement starts but
+    a plant can't be fit. Preferences that fail the up-front checks raise a
+    GardenLayoutException.
+
+    If the awaiting task is cancelled, generation is stopped before the
+    cancellation is passed on.
+    """
+    loop = asyncio.get_running_loop()
+
+    garden = Garden(library, north, west, cross_box)
+    garden.cancel = cancel if cancel is not None else threading.Event()
+    if timeout is not None:
+        garden.deadline = time.monotonic() + timeout
+    if progress is not None:
+        garden.progress = lambda event: loop.call_soon_threadsafe(progress,
+                                                                  event)
+
+    future = loop.run_in_executor(None, run_generation, garden, preferences)
+    try:
+        reason = await asyncio.shield(future)
+    except asyncio.CancelledError:
+        garden.cancel.set()
+        await asyncio.wait([future])
+        raise
+
+    return LayoutResult(garden, reason is None, reason)
@@ -31,14 +31,39 @@ class Box:
         self.north = north
         self.west = west
         self.squares = [([None] * west) for _ in range(north)]
+        self.journal = []
 
     def place_plant(self, name, origin, dimensions):
         """
         Places a plant into the squares according to its size
+
+        The previous contents of each square are kept in the journal so the
+        placement can be rolled back.
         """
         for i in range(dimensions[0]):
             for j in range(dimensions[1]):
-                self.squares[i+origin[0]][j+origin[1]] = name
+                coord = (i+origin[0], j+origin[1])
+                self.journal.append((coord, self.squares[coord[0]][coord[1]]))
+                self.squares[coord[0]][coord[1]] = name
+
+    def checkpoint(self):
+        """
+        Gets a marker for the current state of the box to roll back to
+        """
+        return len(self.journal)
+
+    def rollback(self, checkpoint):
+        """
+        Undoes every change made since the checkpoint, newest first
+
+        Returns a list of the coordinates that were restored.
+        """
+        restored = []
+        while len(self.journal) > checkpoint:
+            coord, previous = self.journal.pop()
+            self.squares[coord[0]][coord[1]] = previous
+            restored.append(coord)
+        return restored
 
     def find_best_squares(self, plant, enemies, companions, dimensions, coords):
         """
@@ -78,7 +103,7 @@ class Box:
 
         # Avoid placing plants together as it increases the chance of pest
         # infestation
-        enemies += plant
+        enemies = enemies + [plant]
 
         for neighbour in self.get_neighbours(origin, dimensions):
             if self.squares[neighbour[0]][neighbour[1]] in enemies:
@@ -153,8 +178,8 @@ class Box:
         """
         coords = []
 
-        for i in range(self.north):
-            for j in range(self.west):
+        for i in range(self.north - size_north + 1):
+            for j in range(self.west - size_west + 1):
                 if self.check_empty((i, j), size_north, size_west):
                     coords.append((i, j))
 
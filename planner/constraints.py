@@ -1,16 +1,214 @@
 #!/usr/bin/env python3
+"""
+Up-front feasibility checks for plant preferences
+
+Every check is a bound computed from the preferences and the garden shape
+alone, so an impossible request is rejected before any placement is done.
+Each check returns a reason string when the preferences can't be laid out,
+or None when they might be.
+"""
 
 # TODO:
 # Constraints:
-# - there can't be more plants than squares available
-# - there can't be more trellises than north boxes
-# - trellised plants must be in the back (north) box
 # - trellised plants must be in the back of a box
 #
-# - taller plants should be on the north side
-# - enemy plants should not be adjacent
 # - companion plants should be adjacent
 #
 # - marigolds should be placed on the edges
 # - marigolds should go in empty squares
 # - nasturtiums should go in empty squares
+
+
+def _ceil_div(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def _count_room(size, boxes, trellises, box_north, box_west):
+    """
+    Gets how many footprints of the size fit into the boxes, plus the
+    trellised boxes with one less row
+    """
+    return (boxes * (box_north // size[0]) +
+            trellises * ((box_north - 1) // size[0])) * (box_west // size[1])
+
+
+def get_min_separator(north, west):
+    """
+    Gets the fewest squares needed to keep two plants apart in a north x west
+    grid, where squares touching diagonally are neighbours. Returns None if
+    the grid is too small to keep any two squares apart.
+
+    This is the smallest cut anywhere in the grid, so it's only a lower
+    bound on what a particular pair of plants needs.
+    """
+    if max(north, west) < 3:
+        return None
+
+    # The cheapest cut is either straight across the grid, or the three
+    # squares around a corner
+    return min(north, west, 3)
+
+
+def check_names(library, preferences):
+    """
+    Every requested plant must be in the library
+    """
+    for plant in preferences:
+        if plant not in library:
+            return '{} is not in the plant library'.format(plant)
+    return None
+
+
+def check_area(preferences, squares):
+    """
+    There can't be more plants than squares available
+    """
+    needed = sum(preferences.values())
+    if needed > squares:
+        return '{} squares requested, but the garden only has {}'.format(
+            needed, squares)
+    return None
+
+
+def check_trellises(library, preferences, west, box_west):
+    """
+    There can't be more trellises than north boxes, and each trellis takes
+    the whole north row of a box
+    """
+    trellises = 0
+    for plant in library.get_trellised(list(preferences.keys())):
+        if preferences[plant] % box_west:
+            return '{} is trellised and needs a multiple of {} squares'.format(
+                plant, box_west)
+        trellises += preferences[plant] // box_west
+
+    if trellises > west:
+        return '{} trellises needed, but only {} north boxes'.format(
+            trellises, west)
+    return None
+
+
+def check_footprints(library, preferences, north, west, box_north, box_west):
+    """
+    Plants larger than a square must fit whole into a box, and there must be
+    enough room left in the boxes for all of them
+    """
+    names = list(preferences.keys())
+    trellises = sum(preferences[plant] // box_west
+                    for plant in library.get_trellised(names))
+
+    footprints = {}
+    for plant in library.get_large_plants(names):
+        size = library.get_size(plant)
+        if size[0] > box_north or size[1] > box_west:
+            return "{} ({}x{}) doesn't fit into a {}x{} box".format(
+                plant, size[0], size[1], box_north, box_west)
+
+        area = size[0] * size[1]
+        if preferences[plant] % area:
+            return '{} needs a multiple of {} squares'.format(plant, area)
+
+        footprints[size] = footprints.get(size, 0) + preferences[plant] // area
+
+    # The trellis takes the north row of a box, leaving one less row for
+    # everything else
+    boxes = north * west - trellises
+    for size, needed in footprints.items():
+        available = _count_room(size, boxes, trellises, box_north, box_west)
+        if needed > available:
+            return 'Only room for {} plants of size {}x{}, {} requested'.format(
+                available, size[0], size[1], needed)
+
+    # A footprint over half a box in both directions needs a box to itself,
+    # taking trellised boxes first as they have the least room left
+    large = [size for size in footprints
+             if 2 * size[0] > box_north and 2 * size[1] > box_west]
+    if not large:
+        return None
+    taken = sum(footprints[size] for size in large)
+    trellised = min(trellises, sum(footprints[size] for size in large
+                                   if size[0] < box_north))
+    if taken - trellised > boxes:
+        return 'Only room for {} plants over half a box, {} requested'.format(
+            boxes + trellised, taken)
+
+    # Then the rest that can't fit beside one of them have to fit into the
+    # boxes left over
+    spare_north = box_north - min(size[0] for size in large)
+    spare_west = box_west - min(size[1] for size in large)
+    for size, needed in footprints.items():
+        if size in large or size[0] <= spare_north or size[1] <= spare_west:
+            continue
+        available = _count_room(size, boxes - (taken - trellised),
+                                trellises - trellised, box_north, box_west)
+        if needed > available:
+            return 'Only room for {} plants of size {}x{} beside the larger ' \
+                'ones, {} requested'.format(available, size[0], size[1],
+                                            needed)
+    return None
+
+
+def check_enemies(library, preferences, north, west, box_north, box_west,
+                  cross_box=False):
+    """
+    Enemy plants that have to share a box need room between them
+
+    When boxes touch, the whole garden is one grid and enemies always need
+    room between them.
+
+    The check only rejects what can't be laid out: it needs the smallest
+    cut in the grid, which any layout keeping them apart has to spend, to
+    fit into the squares that neither of them takes.
+    """
+    box_squares = box_north * box_west
+    if cross_box:
+        separator = get_min_separator(north * box_north, west * box_west)
+    else:
+        separator = get_min_separator(box_north, box_west)
+
+    names = sorted(preferences.keys())
+    for i, plant in enumerate(names):
+        enemies = library.get_enemies(plant)
+        for other in names[i + 1:]:
+            if other not in enemies and plant not in library.get_enemies(other):
+                continue
+
+            # Enough boxes to keep them completely apart
+            if not cross_box and _ceil_div(preferences[plant], box_squares) + \
+                    _ceil_div(preferences[other], box_squares) <= north * west:
+                continue
+
+            # Any square not taken by either of them can separate them
+            spare = north * west * box_squares - \
+                (preferences[plant] + preferences[other])
+            if separator is None or spare < separator:
+                return "{} and {} are enemies and there isn't room to " \
+                    "separate them".format(plant, other)
+    return None
+
+
+def find_infeasibility(library, north, west, preferences,
+                       box_north=4, box_west=4, cross_box=False):
+    """
+    Runs all checks against the preferences, returning the first reason they
+    can't be laid out, or None
+    """
+    reason = check_names(library, preferences)
+    if reason is not None:
+        return reason
+
+    checks = [
+        lambda: check_area(preferences, north * west * box_north * box_west),
+        lambda: check_trellises(library, preferences, west, box_west),
+        lambda: check_footprints(library, preferences, north, west,
+                                 box_north, box_west),
+        lambda: check_enemies(library, preferences, north, west,
+                              box_north, box_west, cross_box),
+    ]
+
+    for check in checks:
+        reason = check()
+        if reason is not None:
+            return reason
+
+    return None
@@ -3,11 +3,24 @@
 Manages overall garden layout
 """
 
-from collections import Counter
-from random import shuffle, choice
+from collections import Counter, namedtuple
+from random import shuffle, choice, randrange
+import time
+import numpy as np
 from terminaltables import SingleTable
 from yattag import Doc, indent
+from adjacency import get_graph
 from box import Box
+from constraints import find_infeasibility
+from patterns import split_quotas
+from shading import ShadeMap
+
+# Plants placed into the gaps once everything requested is in
+BENEFICIALS = ['marigold', 'nasturtium']
+
+# Reported after each placement: the phase of generation, the number of
+# squares placed so far and the running score of the layout as it stands
+Progress = namedtuple('Progress', ['phase', 'placed', 'running_score'])
 
 
 class GardenLayoutException(Exception):
@@ -17,6 +30,20 @@ class GardenLayoutException(Exception):
     pass
 
 
+class GardenLayoutCancelled(GardenLayoutException):
+    """
+    Raised when layout generation is cancelled before it finishes
+    """
+    pass
+
+
+class GardenLayoutTimeout(GardenLayoutCancelled):
+    """
+    Raised when layout generation runs past its deadline
+    """
+    pass
+
+
 class Garden:
     """
     Garden module takes garden size and plant preferences and generates a
@@ -33,13 +60,44 @@ class Garden:
 
                 SOUTH
 
+    With cross_box set, boxes are taken to touch each other, so plants at
+    the edges of neighbouring boxes are scored against each other.
+
+    Generation can be watched and stopped between placements: progress is
+    called with a Progress after each one, and it stops once cancel (a
+    threading.Event) is set or time.monotonic() passes deadline.
+
+    If patterns is set to a PatternTable, empty boxes are filled from the
+    table when it has their mix of plants, instead of searching.
+
+    If trace is set to a PlacementTrace, every placement decision is
+    recorded into it, along with the shape of the garden.
+
+    If rotation is set, see seasons.RotationMap, plants only go where they
+    would break the rotation if nowhere else is left: single plants and
+    trellises go into another box, large plants try every other origin
+    first, and patterns and flowers are left out. Its get_penalty(plant
+    code, origins, dimensions) is also taken off the rank of each candidate.
     """
-    def __init__(self, library, north, west):
+    def __init__(self, library, north, west, cross_box=False):
         self.library = library
         self.boxes = []
         self.requested = {}
+        self.journal = []
+        self.placement_budget = 2000
+        self.attempts = 0
+        self.cancel = None
+        self.deadline = None
+        self.progress = None
+        self.phase = None
+        self.placed = 0
+        self.running_score = 0
+        self.patterns = None
+        self.trace = None
+        self.rotation = None
         self.north = north
         self.west = west
+        self.cross_box = cross_box
 
         for _ in range(north):
             row = []
@@ -49,6 +107,100 @@ class Garden:
 
         self.boxes = [([Box() for _ in range(west)]) for _ in range(north)]
 
+        # Global coordinates of the north west square of each box
+        box = self.boxes[0][0]
+        self.positions = {self.boxes[i][j]: (i * box.north, j * box.west)
+                          for i in range(north)
+                          for j in range(west)}
+        self.box_indices = {self.boxes[i][j]: i * west + j
+                            for i in range(north)
+                            for j in range(west)}
+
+        # Garden-wide scoring state: the plant code of every square in
+        # global coordinates, and how each code gets on with the others
+        self.graph = get_graph(north, west, box.north, box.west, cross_box)
+        self.codes = np.full(self.graph.rows * self.graph.cols, -1,
+                             dtype=np.int32)
+        self.grid = self.codes.reshape(self.graph.rows, self.graph.cols)
+        self.names = []
+        self.plant_codes = {}
+        self.relation = np.zeros((0, 0), dtype=np.int8)
+
+        # Which placement each square belongs to, so the squares of one
+        # large plant aren't scored against each other. -1 where empty.
+        self.footprints = np.full(self.codes.shape, -1, dtype=np.int32)
+
+        # Taller plants should be on the north side
+        self.shade = ShadeMap(self.graph.rows, self.graph.cols)
+        self.heights = {}
+
+    def prepare_scoring(self, names):
+        """
+        Builds the relation matrix for the plants that may be placed
+
+        Does nothing if all of the names are already covered.
+        """
+        names = [name for name in names if name in self.library]
+        if all(name in self.plant_codes for name in names):
+            return
+
+        self.names = self.names + [name for name in names
+                                   if name not in self.plant_codes]
+        self.plant_codes = {name: i for i, name in enumerate(self.names)}
+        self.relation = self.library.get_relation_matrix(self.names)
+        self.heights = {name: self.library.get_height(name)
+                        for name in self.names}
+
+    def share_scoring(self, garden):
+        """
+        Uses the plant codes and relation matrix of another garden rather
+        than building new ones. Neither garden changes them afterwards
+        unless new plants are requested.
+        """
+        self.names = garden.names
+        self.plant_codes = garden.plant_codes
+        self.relation = garden.relation
+        self.heights = garden.heights
+
+    def rank_squares(self, box, plant, dimensions, coords):
+        """
+        Ranks the plant at each of the coordinates in a box by how well it
+        gets on with its neighbours across the whole garden, less the shade
+        it would receive and cast
+        """
+        row, col = self.positions[box]
+        origins = [(row + coord[0], col + coord[1]) for coord in coords]
+        ranks = self.graph.rank_origins(self.codes, self.relation,
+                                        self.plant_codes[plant], origins,
+                                        dimensions)
+        ranks -= self.shade.get_penalty(self.heights[plant], origins,
+                                        dimensions)
+        if self.rotation is not None:
+            ranks -= self.rotation.get_penalty(self.plant_codes[plant],
+                                               origins, dimensions)
+        return ranks
+
+    def place_best(self, box, plant, dimensions, coords):
+        """
+        Places the plant at a random one of the best ranked coordinates
+        """
+        ranks = self.rank_squares(box, plant, dimensions, coords)
+        top = ranks.max()
+        best = [coord for coord, rank in zip(coords, ranks) if rank == top]
+        draw = randrange(len(best))
+
+        decision = None
+        if self.trace is not None:
+            decision = (len(coords), len(best), draw, top, ranks.min())
+        self.place_plant(box, plant, best[draw], dimensions, decision)
+
+    def score(self):
+        """
+        Scores the whole layout, higher is better. Squares of the same
+        large plant aren't neighbours of each other.
+        """
+        return self.graph.score(self.codes, self.relation, self.footprints)
+
     def place_trellised(self):
         """
         Places trellised plants into boxes
@@ -59,6 +211,7 @@ class Garden:
         # TODO When boxes can be arbitrary sizes, a trellised plant would
         # span the north row, and its size would be 1xn
 
+        self.phase = 'trellised'
         trellised = self.library.get_trellised(list(self.requested.keys()))
         shuffle(trellised)
 
@@ -68,25 +221,112 @@ class Garden:
         # Get the total number of trellised boxes required, fail early if there
         # isn't enough.
         needed = sum([self.requested[plant] for plant in trellised])
-        if int(needed / boxes[0].west) > len(boxes):
+        if -(-needed // boxes[0].west) > len(boxes):
             raise GardenLayoutException('Too many trellised plants for boxes')
 
         # Place the plant in the box and remove it from the requested
         # list
         for plant in trellised:
+            # Trellises the plant would break the rotation in go last
+            boxes.sort(key=lambda box: self.get_rotation_penalty(
+                box, plant, [(0, 0)], (1, box.west))[0] > 0)
             while plant in self.requested:
-                boxes[0].place_plant(plant, (0, 0), (1, boxes[0].west))
+                self.check_cancelled()
+                self.place_plant(boxes[0], plant, (0, 0), (1, boxes[0].west))
                 self.record_placed_plant(plant, boxes[0].west)
                 boxes.pop(0)
 
+    def check_cancelled(self):
+        """
+        Stops generation between placements once the cancel event is set or
+        the deadline has passed
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise GardenLayoutCancelled('Layout generation was cancelled')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise GardenLayoutTimeout('Layout generation ran out of time')
+
+    def place_plant(self, box, plant, origin, size, decision=None):
+        """
+        Places a plant into one of the garden's boxes, journaling the change
+
+        decision is passed on to the trace, see PlacementTrace.record.
+        """
+        if self.trace is not None:
+            self.trace.record(self.phase, plant, self.box_indices[box],
+                              origin, size, decision)
+
+        row, col = self.positions[box]
+        self.journal.append(('score', None, self.running_score))
+        if plant in self.plant_codes:
+            self.running_score += self.graph.score_footprint(
+                self.codes, self.relation, self.plant_codes[plant],
+                (row + origin[0], col + origin[1]), size)
+
+        self.journal.append(('box', box, box.checkpoint()))
+        box.place_plant(plant, origin, size)
+
+        self.grid[row + origin[0]:row + origin[0] + size[0],
+                  col + origin[1]:col + origin[1] + size[1]] = \
+            self.plant_codes.get(plant, -1)
+        self.footprints.reshape(self.grid.shape)[
+            row + origin[0]:row + origin[0] + size[0],
+            col + origin[1]:col + origin[1] + size[1]] = len(self.journal)
+        self.shade.place(self.heights.get(plant, -1),
+                         (row + origin[0], col + origin[1]), size)
+
+        self.placed += size[0] * size[1]
+        if self.progress is not None:
+            self.progress(Progress(self.phase, self.placed,
+                                   self.running_score))
+
     def record_placed_plant(self, plant, size):
         """
         Removes a plant from the requested list
         """
+        self.journal.append(('requested', plant, self.requested[plant]))
         self.requested[plant] -= size
         if self.requested[plant] == 0:
             self.requested.pop(plant)
 
+    def checkpoint(self):
+        """
+        Gets a marker for the current layout to roll back to
+        """
+        return len(self.journal)
+
+    def rollback(self, checkpoint):
+        """
+        Undoes every placement made since the checkpoint, newest first
+        """
+        placements = 0
+        rows = set()
+        while len(self.journal) > checkpoint:
+            kind, target, previous = self.journal.pop()
+            if kind == 'box':
+                placements += 1
+                row, col = self.positions[target]
+                restored = target.rollback(previous)
+                self.placed -= len(restored)
+                for coord in restored:
+                    plant = target.squares[coord[0]][coord[1]]
+                    self.grid[row + coord[0], col + coord[1]] = \
+                        self.plant_codes.get(plant, -1)
+                    self.footprints[self.graph.get_index(
+                        row + coord[0], col + coord[1])] = -1
+                    self.shade.heights[row + coord[0], col + coord[1]] = \
+                        self.heights.get(plant, -1)
+                    rows.add(row + coord[0])
+            elif kind == 'score':
+                self.running_score = previous
+            else:
+                self.requested[target] = previous
+        if rows:
+            self.shade.refresh(slice(min(rows), max(rows) + 1))
+
+        if self.trace is not None and placements:
+            self.trace.record_rollback(placements)
+
     def place_large_plants(self):
         """
         Large plants take more than one square. Place them first to make it
@@ -97,89 +337,399 @@ class Garden:
 
         TODO 2x2 plants should prefer to be on the edges?
         """
+        self.phase = 'large'
         large = self.library.get_large_plants(list(self.requested.keys()))
+
+        # Biggest first, as they're the hardest to fit in later
         shuffle(large)
+        large.sort(key=lambda plant: -self.library.get_size(plant)[0] *
+                   self.library.get_size(plant)[1])
 
+        footprints = []
         for plant in large:
             size = self.library.get_size(plant)
-
-            boxes = [box
-                     for sublist in self.boxes
-                     for box in sublist]
-            shuffle(boxes)
-
-            for box in boxes:
-                coords = box.check_fit(size[0], size[1])
-                best = box.find_best_squares(plant,
-                                             self.library.get_enemies(plant),
-                                             self.library.get_companions(plant),
-                                             size,
-                                             coords)
-                if len(best):
-                    box.place_plant(plant, choice(best), size)
-                    self.record_placed_plant(plant, size[0]*size[1])
-                    break
+            footprints += [(plant, size)] * \
+                (self.requested[plant] // (size[0] * size[1]))
+
+        # When a footprint doesn't fit anywhere, undo the footprints before
+        # it one at a time and move them to their next best origin. Each
+        # level is (checkpoint, candidates, candidate placed).
+        levels = []
+        self.attempts = 0
+        blocked = None
+        while len(levels) < len(footprints) or \
+                (levels and levels[-1][2] is None):
+            self.check_cancelled()
+            if levels and levels[-1][2] is None:
+                # The newest footprint ran out of origins
+                levels.pop()
+                if len(levels) == 0 or \
+                        self.attempts > self.placement_budget:
+                    raise GardenLayoutException(
+                        "Couldn't fit {} into any box".format(blocked[1]))
+                checkpoint, candidates, _ = levels[-1]
+                self.rollback(checkpoint)
             else:
-                raise GardenLayoutException("Couldn't fit {} into any box".format(plant))
+                plant, size = footprints[len(levels)]
+                checkpoint = self.checkpoint()
+                candidates = self.get_candidates(plant, size,
+                                                 self.get_after(footprints,
+                                                                levels))
+                levels.append((checkpoint, candidates, None))
+
+            level = len(levels) - 1
+            candidate, plant = self.place_candidate(footprints, level,
+                                                    candidates, checkpoint)
+            levels[-1] = (checkpoint, candidates, candidate)
+
+            # Blame the plant that ran out of room the furthest in
+            if candidate is None and (blocked is None or level >= blocked[0]):
+                blocked = (level, plant)
+
+    def get_after(self, footprints, levels):
+        """
+        Gets the garden-wide index the next footprint's origin must be
+        after. Footprints of the same plant are interchangeable, so each set
+        of origins is only tried in one order.
+        """
+        if len(levels) == 0 or \
+                footprints[len(levels) - 1][0] != footprints[len(levels)][0]:
+            return -1
+        box, origin, _ = levels[-1][2]
+        return self.get_square_index(box, origin)
+
+    def get_square_index(self, box, coord):
+        """
+        Gets the garden-wide index of a square in a box
+        """
+        row, col = self.positions[box]
+        return self.graph.get_index(row + coord[0], col + coord[1])
+
+    def place_candidate(self, footprints, level, candidates, checkpoint):
+        """
+        Places the footprint at the level at its next candidate that leaves
+        room for the footprints after it
+
+        Returns the candidate and the footprint's plant, or None and the
+        plant that there was no room for.
+        """
+        plant, size = footprints[level]
+        blocked = plant
+        for box, origin, decision in candidates:
+            if self.attempts > self.placement_budget:
+                break
+            self.attempts += 1
+            self.place_plant(box, plant, origin, size, decision)
+            self.record_placed_plant(plant, size[0]*size[1])
+
+            after = -1
+            if level + 1 < len(footprints) and \
+                    footprints[level + 1][0] == plant:
+                after = self.get_square_index(box, origin)
+            blocked = self.check_room(footprints[level + 1:], after)
+            if blocked is None:
+                return (box, origin, decision), plant
+            self.rollback(checkpoint)
+        return None, blocked
+
+    def check_room(self, footprints, after=-1):
+        """
+        Checks whether there could still be room for the footprints, where
+        the ones of the same plant as the first have to be after the
+        garden-wide index after
+
+        Returns a plant there's no room for, or None.
+        """
+        if len(footprints) == 0:
+            return None
+        plants = {}
+        for plant, size in footprints:
+            plants.setdefault(size, []).append(plant)
+        rooms = {size: self.count_room(size) for size in plants}
+        blocked = self.check_sizes(plants, rooms)
+        if blocked is not None or after < 0:
+            return blocked
+
+        # Only the first plant's footprints have to be after its last one,
+        # checked second so a plant that's short of room anyway is named
+        first, size = footprints[0]
+        restricted = self.count_room(size, after)
+        if restricted.sum() < plants[size].count(first):
+            return first
+        if set(plants[size]) == {first}:
+            rooms[size] = restricted
+            return self.check_sizes(plants, rooms)
+        return None
+
+    def check_sizes(self, plants, rooms):
+        """
+        Checks whether the footprints of each size, plants, fit into their
+        room in each box, rooms
+
+        A footprint over half a box in both directions needs a box to
+        itself, so those boxes are taken out of the room for footprints too
+        big to fit beside it, giving up the ones with the least room.
+
+        Returns a plant there's no room for, or None.
+        """
+        box = self.boxes[0][0]
+        large = [size for size in plants
+                 if 2 * size[0] > box.north and 2 * size[1] > box.west]
+        needed = sum(len(plants[size]) for size in large)
+        capable = np.zeros((self.north, self.west), dtype=bool)
+        for size in large:
+            capable |= rooms[size] > 0
+
+        if large:
+            spare_north = box.north - min(size[0] for size in large)
+            spare_west = box.west - min(size[1] for size in large)
+        for size, sized in plants.items():
+            room = int(rooms[size].sum())
+            if large and size not in large and \
+                    size[0] > spare_north and size[1] > spare_west:
+                room -= int(np.sort(rooms[size][capable])[:needed].sum())
+            if room < len(sized):
+                return sized[0]
+
+        if needed > np.count_nonzero(capable):
+            return plants[large[-1]][0]
+        return None
+
+    def count_room(self, size, after=-1):
+        """
+        Gets an upper bound on how many more footprints of the size fit
+        into each box, with origins after the garden-wide index after
+
+        A footprint covers exactly one square of a box whose row is a given
+        remainder mod size[0] and column a given remainder mod size[1], so no
+        more can fit into a box than the fewest free squares with the same
+        remainders that some footprint could still cover.
+        """
+        box = self.boxes[0][0]
+        rows, cols = self.grid.shape
+        taken = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+        planted = self.footprints.reshape(self.grid.shape) >= 0
+        taken[1:, 1:] = planted.cumsum(axis=0).cumsum(axis=1)
+
+        # Origins of free footprints that don't cross into another box
+        south = rows - size[0] + 1
+        east = cols - size[1] + 1
+        row = np.arange(south).reshape(-1, 1)
+        col = np.arange(east).reshape(1, -1)
+        fits = ((taken[row + size[0], col + size[1]] -
+                 taken[row, col + size[1]] - taken[row + size[0], col] +
+                 taken[row, col]) == 0) & \
+            (row % box.north <= box.north - size[0]) & \
+            (col % box.west <= box.west - size[1]) & \
+            (row * cols + col > after)
+
+        covered = np.zeros((rows, cols), dtype=bool)
+        for i in range(size[0]):
+            for j in range(size[1]):
+                covered[i:i + south, j:j + east] |= fits
+
+        north_phase = np.arange(rows) % box.north % size[0]
+        west_phase = np.arange(cols) % box.west % size[1]
+        rooms = [(covered & (north_phase == i).reshape(-1, 1) &
+                  (west_phase == j).reshape(1, -1)).reshape(
+                      self.north, box.north, self.west, box.west).sum(
+                          axis=(1, 3))
+                 for i in range(size[0])
+                 for j in range(size[1])]
+        return np.min(rooms, axis=0)
+
+    def get_candidates(self, plant, dimensions, after=-1):
+        """
+        Generates every (box, origin, decision) the plant fits into across
+        the garden, best ranked first with ties in random order. Only
+        origins with a garden-wide index after after are included.
+        """
+        boxes = [box
+                 for sublist in self.boxes
+                 for box in sublist]
+
+        ranked = []
+        for box in boxes:
+            coords = [coord
+                      for coord in box.check_fit(dimensions[0], dimensions[1])
+                      if self.get_square_index(box, coord) > after]
+            if len(coords) == 0:
+                continue
+            ranks = self.rank_squares(box, plant, dimensions, coords)
+            broken = self.get_rotation_penalty(box, plant, coords,
+                                               dimensions) > 0
+            ranked += [(rank, box, coord, breaks)
+                       for rank, coord, breaks in zip(ranks, coords, broken)]
+
+        # Origins that break the rotation are only tried once every other
+        # one has been
+        shuffle(ranked)
+        ranked.sort(key=lambda candidate: (candidate[3], -candidate[0]))
+        if len(ranked) == 0:
+            return
+
+        best = ranked[0][0]
+        worst = min(candidate[0] for candidate in ranked)
+        tied = sum(1 for candidate in ranked
+                   if candidate[0] == best and candidate[3] == ranked[0][3])
+        for i, (rank, box, coord, _) in enumerate(ranked):
+            decision = None
+            if self.trace is not None:
+                decision = (len(ranked), tied, i, best, worst)
+            yield box, coord, decision
+
+    def place_patterns(self):
+        """
+        Fills empty boxes with precomputed patterns, splitting the remaining
+        single square plants evenly between them. Boxes whose mix isn't in
+        the table are left for place_single_plants.
+        """
+        self.phase = 'pattern'
+        boxes = [box
+                 for sublist in self.boxes
+                 for box in sublist
+                 if all(square is None
+                        for row in box.squares
+                        for square in row)]
+        if len(boxes) == 0:
+            return
+
+        squares = self.patterns.box_north * self.patterns.box_west
+        for box, quotas in zip(boxes, split_quotas(self.requested, len(boxes),
+                                                   squares)):
+            if box.north != self.patterns.box_north or \
+                    box.west != self.patterns.box_west:
+                continue
+            pattern = self.patterns.lookup(quotas)
+            if pattern is None:
+                continue
+
+            # Patterns don't know last season's layout, so leave boxes they
+            # would break the rotation in to the search
+            if any(len(self.get_rotation_allowed(box, plant, [(i, j)])) == 0
+                   for i, row in enumerate(pattern)
+                   for j, plant in enumerate(row)
+                   if plant is not None):
+                continue
+
+            self.check_cancelled()
+            for i, row in enumerate(pattern):
+                for j, plant in enumerate(row):
+                    if plant is not None:
+                        self.place_plant(box, plant, (i, j), (1, 1))
+                        self.record_placed_plant(plant, 1)
 
     def place_single_plants(self):
         """
         Places all remaining single square plants
         """
+        self.phase = 'single'
         while len(self.requested):
             plants = list(self.requested.keys())
             shuffle(plants)
 
             for plant in plants:
+                self.check_cancelled()
                 boxes = [box
                          for sublist in self.boxes
                          for box in sublist]
                 shuffle(boxes)
+
+                # Only break the rotation when every box would
+                fallback = None
                 for box in boxes:
                     coords = box.check_fit(1, 1)
                     if len(coords) == 0:
                         continue
-                    print('Placing {}, {} squares left, {} plants remaining'.format(plant, self.requested[plant], len(self.requested) - 1))
-                    best = box.find_best_squares(plant,
-                                                 self.library.get_enemies(plant),
-                                                 self.library.get_companions(plant),
-                                                 (1, 1),
-                                                 coords)
-                    if len(best):
-                        box.place_plant(plant, choice(best), (1, 1))
-                        self.record_placed_plant(plant, 1)
+                    allowed = self.get_rotation_allowed(box, plant, coords)
+                    if len(allowed):
+                        self.place_best(box, plant, (1, 1), allowed)
                         break
+                    if fallback is None:
+                        fallback = (box, coords)
                 else:
-                    raise GardenLayoutException("Couldn't fit {} into any box".format(plant))
+                    if fallback is None:
+                        raise GardenLayoutException("Couldn't fit {} into any box".format(plant))
+                    self.place_best(fallback[0], plant, (1, 1), fallback[1])
+                self.record_placed_plant(plant, 1)
 
     def place_beneficials(self):
         """
         Place beneficial plants: marigolds and nasturtiums
         """
+        self.phase = 'beneficial'
         boxes = [box
                  for sublist in self.boxes
                  for box in sublist]
 
         for box in boxes:
-            edges = box.get_edge_squares()
+            edges = self.get_rotation_allowed(box, 'marigold',
+                                              box.get_edge_squares())
             if len(edges):
                 coord = choice(edges)
-                box.place_plant('marigold', coord, (1, 1))
+                self.place_plant(box, 'marigold', coord, (1, 1))
 
         for box in boxes:
-            coords = box.check_fit(1, 1)
+            coords = self.get_rotation_allowed(box, 'nasturtium',
+                                               box.check_fit(1, 1))
             if len(coords):
-                box.place_plant('nasturtium', choice(coords), (1, 1))
+                self.place_plant(box, 'nasturtium', choice(coords), (1, 1))
+
+    def get_rotation_penalty(self, box, plant, coords, dimensions=(1, 1)):
+        """
+        Gets the rotation penalty of the plant at each of the coordinates in
+        a box, all 0 if there's no rotation
+        """
+        if self.rotation is None or plant not in self.plant_codes:
+            return np.zeros(len(coords), dtype=np.int32)
+        row, col = self.positions[box]
+        return self.rotation.get_penalty(
+            self.plant_codes[plant],
+            [(row + coord[0], col + coord[1]) for coord in coords], dimensions)
+
+    def get_rotation_allowed(self, box, plant, coords):
+        """
+        Keeps the coordinates in a box where the plant doesn't break the
+        rotation, all of them if there's no rotation
+        """
+        if self.rotation is None or plant not in self.plant_codes:
+            return coords
+        row, col = self.positions[box]
+        allowed = self.rotation.get_allowed(self.plant_codes[plant])
+        return [coord for coord in coords
+                if allowed[row + coord[0], col + coord[1]]]
+
+    def check_feasible(self, preferences):
+        """
+        Checks the preferences against cheap bounds before any placement
+
+        Raises a GardenLayoutException with the reason if they can't fit.
+        """
+        box = self.boxes[0][0]
+        reason = find_infeasibility(self.library, self.north, self.west,
+                                    preferences, box.north, box.west,
+                                    self.cross_box)
+        if reason is not None:
+            raise GardenLayoutException(reason)
 
     def generate(self, preferences):
         """
         Generates the garden layout
 
         preferences is a map of plant names to requested squares
+
+        Raises a GardenLayoutException straight away if the preferences can
+        never fit into this garden.
         """
-        self.requested = preferences
+        self.check_feasible(preferences)
+        if self.trace is not None:
+            self.trace.shape = (self.north, self.west)
+        self.requested = dict(preferences)
+        self.prepare_scoring(list(preferences.keys()) + BENEFICIALS)
         self.place_trellised()
         self.place_large_plants()
+        if self.patterns is not None:
+            self.place_patterns()
         self.place_single_plants()
         self.place_beneficials()
 
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Precomputed box fill patterns
+
+An offline search scores fills of a box for each mix of single square
+plants, and the best fill of each mix is kept in a table keyed by the mix.
+A mix counts its empty squares under None, so boxes that are only partly
+filled are keyed too. Generation looks up the mix for a box and only
+searches when the mix isn't in the table.
+
+Usage: patterns.py plants.yaml table.json plant [plant ...]
+"""
+
+import json
+from math import comb
+from random import shuffle, choice
+import sys
+import numpy as np
+from adjacency import AdjacencyGraph
+
+
+def get_mix_key(quotas, squares):
+    """
+    Gets the canonical form of a mix of plants in a box of the given number
+    of squares: sorted (name, squares) pairs, leaving out plants with no
+    squares, then (None, empty squares) if any are left empty
+    """
+    key = tuple(sorted((plant, count)
+                       for plant, count in quotas.items()
+                       if plant is not None and count))
+    empty = squares - sum(count for _, count in key)
+    if empty:
+        key += ((None, empty),)
+    return key
+
+
+def enumerate_mixes(names, squares):
+    """
+    Generates every mix of the plants that takes exactly the given number of
+    squares. None can be one of the names to count empty squares.
+    """
+    if len(names) == 1:
+        yield {names[0]: squares}
+        return
+
+    for count in range(squares + 1):
+        for rest in enumerate_mixes(names[1:], squares - count):
+            mix = {names[0]: count}
+            mix.update(rest)
+            yield mix
+
+
+def split_quotas(requested, boxes, squares):
+    """
+    Splits the requested squares evenly over a number of boxes, giving each
+    box no more than the squares it has
+
+    Returns a list of quotas, one per box. Anything that doesn't fit is left
+    out.
+    """
+    quotas = [{} for _ in range(boxes)]
+    totals = [0] * boxes
+
+    for plant in sorted(requested):
+        for _ in range(requested[plant]):
+            i = totals.index(min(totals))
+            if totals[i] == squares:
+                break
+            quotas[i][plant] = quotas[i].get(plant, 0) + 1
+            totals[i] += 1
+
+    return quotas
+
+
+def search_fill(library, quotas, box_north=4, box_west=4, attempts=20):
+    """
+    Searches for a good fill of one box with the mix of plants
+
+    Each attempt places the plants one square at a time, in random order,
+    into the squares where they get on best with their neighbours. Returns
+    the best score and its squares as rows of plant names.
+    """
+    names = sorted(plant for plant in quotas if plant is not None)
+    relation = library.get_relation_matrix(names)
+    graph = AdjacencyGraph(1, 1, box_north, box_west)
+
+    best_score = None
+    best_codes = None
+    for _ in range(attempts):
+        codes = np.full(box_north * box_west, -1, dtype=np.int32)
+
+        order = [i for i, plant in enumerate(names)
+                 for _ in range(quotas[plant])]
+        shuffle(order)
+
+        for plant in order:
+            empty = np.flatnonzero(codes < 0)
+            origins = [divmod(int(square), box_west) for square in empty]
+            ranks = graph.rank_origins(codes, relation, plant, origins, (1, 1))
+            codes[choice(empty[ranks == ranks.max()])] = plant
+
+        score = graph.score(codes, relation)
+        if best_score is None or score > best_score:
+            best_score = score
+            best_codes = codes
+
+    squares = [names[code] if code >= 0 else None for code in best_codes]
+    return best_score, [squares[i:i + box_west]
+                        for i in range(0, len(squares), box_west)]
+
+
+class PatternTable:
+    """
+    The best known fill of a box for each mix of plants
+    """
+
+    def __init__(self, box_north=4, box_west=4):
+        self.box_north = box_north
+        self.box_west = box_west
+        self.patterns = {}
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def get_key(self, quotas):
+        """
+        Gets the key of a mix of plants in one of the table's boxes
+        """
+        return get_mix_key(quotas, self.box_north * self.box_west)
+
+    def add(self, quotas, score, squares):
+        """
+        Keeps the fill for the mix if it beats the one already known
+        """
+        key = self.get_key(quotas)
+        if key not in self.patterns or score > self.patterns[key][0]:
+            self.patterns[key] = (score, squares)
+
+    def lookup(self, quotas):
+        """
+        Gets the fill for the mix as rows of plant names, or None
+        """
+        pattern = self.patterns.get(self.get_key(quotas))
+        if pattern is None:
+            return None
+        return pattern[1]
+
+    def save(self, filename):
+        """
+        Writes the table as JSON, with each fill stored as a hex string of
+        indices into a shared list of names
+        """
+        names = sorted({plant
+                        for key in self.patterns
+                        for plant, _ in key
+                        if plant is not None})
+        codes = {name: i + 1 for i, name in enumerate(names)}
+
+        # Empty squares are stored as 0, in the key and the fill
+        patterns = []
+        for key, (score, squares) in self.patterns.items():
+            fill = bytes(codes.get(square, 0)
+                         for row in squares
+                         for square in row)
+            patterns.append([[[codes.get(plant, 0), count]
+                              for plant, count in key],
+                             score, fill.hex()])
+        patterns.sort()
+
+        with open(filename, 'w') as table_doc:
+            json.dump({'box': [self.box_north, self.box_west],
+                       'names': names,
+                       'patterns': patterns}, table_doc)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a table written by save
+        """
+        with open(filename) as table_doc:
+            data = json.load(table_doc)
+
+        table = cls(*data['box'])
+        names = [None] + data['names']
+        for key, score, fill in data['patterns']:
+            quotas = {names[code]: count for code, count in key}
+            squares = [names[code] for code in bytes.fromhex(fill)]
+            table.add(quotas, score,
+                      [squares[i:i + table.box_west]
+                       for i in range(0, len(squares), table.box_west)])
+        return table
+
+
+def count_mixes(plants, squares):
+    """
+    Gets the number of mixes of the plants that fit into a box with the
+    given number of squares, empty squares included
+    """
+    return comb(squares + plants, plants) - 1
+
+
+def build_pattern_table(library, names, box_north=4, box_west=4,
+                        attempts=20, max_mixes=10000):
+    """
+    Searches for the best fill of every mix of the plants that fits into a
+    box, including boxes left partly empty
+
+    The number of mixes grows quickly with the number of plants, see
+    count_mixes: for a 4x4 box, 4 plants have 4844 mixes and 6 have 74612.
+    Raises a ValueError if there would be more than max_mixes.
+    """
+    squares = box_north * box_west
+    mixes = count_mixes(len(names), squares)
+    if mixes > max_mixes:
+        raise ValueError('{} plants have {} mixes, more than {}'.format(
+            len(names), mixes, max_mixes))
+
+    table = PatternTable(box_north, box_west)
+    for quotas in enumerate_mixes(sorted(names) + [None], squares):
+        if quotas[None] == squares:
+            continue
+        score, fill = search_fill(library, quotas, box_north, box_west,
+                                  attempts)
+        table.add(quotas, score, fill)
+    return table
+
+
+if __name__ == '__main__':
+    from plant_database import PlantDatabase
+    from plant_library import PlantLibrary
+
+    LIBRARY = PlantLibrary(PlantDatabase([sys.argv[1]]))
+    build_pattern_table(LIBRARY, sys.argv[3:]).save(sys.argv[2])
@@ -4,22 +4,27 @@ Garden planner
 """
 import sys
 import pprint
-import yaml
 from garden import Garden
-from plant_info import PlantInfo
+from plant_database import PlantDatabase
 from plant_library import PlantLibrary
 import planner_ui
 
 # TODO Make each box customizable
 SQUARES_PER_BOX = 16
 
+# Boxes are built touching each other, so plants at their edges are
+# neighbours
+BOXES_TOUCH = True
 
-def load_plants_db(filename):
+
+def load_plants_db(*filenames):
+    """
+    Indexes the plant database files, later files overlaying earlier ones.
+    Plants are only parsed when they are first looked up.
+    """
     # TODO handle missing file
     # TODO handle invalid yaml data
-    with open(filename) as plants_doc:
-        plants_yaml = yaml.load(plants_doc)
-    return {p: PlantInfo(p, plants_yaml[p]) for p in plants_yaml}
+    return PlantDatabase(filenames)
 
 
 def get_garden_details():
@@ -31,11 +36,11 @@ def get_garden_details():
     return north, west
 
 
-def get_plant_preferences(plants, squares, trellis):
+def get_plant_preferences(plants, squares, trellis, preview=None):
     """
     Plant preferences are a map of plants to number of squares in garden
     """
-    return planner_ui.get_plant_list(plants, squares, trellis)
+    return planner_ui.get_plant_list(plants, squares, trellis, preview)
 
 
 def generate_garden_layout(library, north, west, plant_prefs):
@@ -43,7 +48,7 @@ def generate_garden_layout(library, north, west, plant_prefs):
     Generate a list of boxes, containing a list of squares with plant names
     """
 
-    garden = Garden(library, north, west)
+    garden = Garden(library, north, west, BOXES_TOUCH)
     garden.generate(plant_prefs)
 
     return garden
@@ -61,12 +66,16 @@ def main():
     # Query for garden details
     north, west = get_garden_details()
 
-    # Query for plant details
-    plant_prefs = get_plant_preferences(plants, north*west*SQUARES_PER_BOX, west)
+    # Query for plant details, previewing the layout as plants are added
+    preview = planner_ui.LayoutPreview(plant_library, north, west, BOXES_TOUCH)
+    plant_prefs = get_plant_preferences(plants, north*west*SQUARES_PER_BOX, west,
+                                        preview)
 
-    # Generate the layout
-    garden_layout = generate_garden_layout(plant_library, north, west,
-                                           plant_prefs)
+    # Generate the layout, unless the preview already has for the same list
+    garden_layout = preview.finish(plant_prefs)
+    if garden_layout is None:
+        garden_layout = generate_garden_layout(plant_library, north, west,
+                                               plant_prefs)
 
     # Display the grid
     html = garden_layout.render_html()
@@ -3,9 +3,20 @@
 Helpers for asking questions about the garden
 """
 
+import threading
 from prompt_toolkit import prompt
 from prompt_toolkit.validation import Validator, ValidationError
-from prompt_toolkit.contrib.completers import WordCompleter
+from prompt_toolkit.completion import WordCompleter
+from constraints import find_infeasibility
+from garden import Garden, GardenLayoutException, GardenLayoutCancelled
+
+# Seconds between toolbar redraws while a preview is generating
+REFRESH_INTERVAL = 0.5
+
+# Most boxes north and west shown in the preview, so a large garden
+# doesn't push the prompt off the screen
+PREVIEW_NORTH = 2
+PREVIEW_WEST = 3
 
 
 class PlantNameValidator(Validator):
@@ -51,6 +62,148 @@ class PlantSquareValidator(Validator):
             raise ValidationError(message='This plant needs to have a multiple of {} squares'.format(self.size))
 
 
+class LayoutPreview:
+    """
+    Generates a layout in a background thread each time the plant list
+    changes, so the prompt can show how the garden is shaping up without
+    waiting for the user to finish
+    """
+
+    def __init__(self, library, north, west, cross_box=False):
+        self.library = library
+        self.north = north
+        self.west = west
+        self.cross_box = cross_box
+        self.lock = threading.Lock()
+        self.cancel = None
+        self.thread = None
+        self.status = 'No plants selected'
+        self.layout = None
+        self.preferences = None
+
+    def submit(self, preferences):
+        """
+        Starts generating a layout for the preferences, cancelling any run
+        that is still working on an older list
+        """
+        reason = find_infeasibility(self.library, self.north, self.west,
+                                    preferences, cross_box=self.cross_box)
+        cancel = threading.Event()
+
+        with self.lock:
+            if self.cancel is not None:
+                self.cancel.set()
+            self.cancel = cancel
+            self.preferences = dict(preferences)
+
+            if reason is not None:
+                self.status = 'Infeasible: {}'.format(reason)
+                self.layout = None
+                self.thread = None
+                return
+
+            self.status = 'Generating layout...'
+
+            self.thread = threading.Thread(target=self.generate,
+                                           args=(dict(preferences), cancel))
+            self.thread.daemon = True
+            self.thread.start()
+
+    def generate(self, preferences, cancel):
+        """
+        Runs in the background thread, keeping the result only if no newer
+        run has been submitted
+        """
+        garden = Garden(self.library, self.north, self.west, self.cross_box)
+        garden.cancel = cancel
+
+        try:
+            garden.generate(preferences)
+            status = 'Layout OK'
+        except GardenLayoutCancelled:
+            return
+        except GardenLayoutException as error:
+            status = 'Layout failed: {}'.format(error)
+            garden = None
+
+        with self.lock:
+            if cancel is self.cancel:
+                self.status = status
+                self.layout = garden
+
+    def finish(self, preferences):
+        """
+        Stops previewing once the plant list is final
+
+        Returns the layout of the preferences, waiting for the run still
+        working on them if there is one, or None if there's no such layout.
+        Any run on another list is cancelled.
+        """
+        with self.lock:
+            current = self.preferences == preferences
+            thread = self.thread
+            if not current and self.cancel is not None:
+                self.cancel.set()
+
+        if current and thread is not None:
+            thread.join()
+
+        with self.lock:
+            if current and self.status == 'Layout OK':
+                return self.layout
+        return None
+
+    def get_toolbar(self, squares, trellis):
+        """
+        Gets the toolbar text: remaining capacity, status and the latest
+        layout
+        """
+        with self.lock:
+            status = self.status
+            layout = self.layout
+
+        lines = ['{} squares, {} trellises remaining | {}'.format(
+            squares, trellis, status)]
+        if layout is not None:
+            lines += format_layout(layout)
+        return '\n'.join(lines)
+
+
+def format_layout(garden, north=PREVIEW_NORTH, west=PREVIEW_WEST):
+    """
+    Gets a compact text grid of the garden, one line per row of squares
+    with boxes separated by bars
+
+    Only the north west corner of up to north x west boxes is shown, with a
+    line saying how much was left out.
+    """
+    lines = []
+    for row in garden.boxes[:north]:
+        for i in range(row[0].north):
+            lines.append(' | '.join(
+                ' '.join((square or '.')[:3].ljust(3)
+                         for square in box.squares[i])
+                for box in row[:west]))
+        lines.append('')
+    lines.pop()
+
+    if garden.north > north or garden.west > west:
+        lines.append('({}x{} of {}x{} boxes shown)'.format(
+            min(north, garden.north), min(west, garden.west), garden.north,
+            garden.west))
+    return lines
+
+
+def ask(message, toolbar=None, **kwargs):
+    """
+    Prompts for an answer, showing the toolbar underneath if there is one
+    """
+    if toolbar is not None:
+        kwargs['bottom_toolbar'] = toolbar
+        kwargs['refresh_interval'] = REFRESH_INTERVAL
+    return prompt(message, **kwargs)
+
+
 def get_north_boxes():
     """
     Prompt for the boxes in the north/south direction
@@ -69,64 +222,77 @@ def get_west_boxes():
     return int(answer)
 
 
-def get_plant(plant_names):
+def get_plant(plant_names, toolbar=None):
     """
     Gets a plant to choose
     """
 
     completer = WordCompleter(plant_names)
     validator = PlantNameValidator(plant_names)
-    text = prompt('Select a plant: ', completer=completer,
-                  validator=validator)
+    text = ask('Select a plant: ', toolbar, completer=completer,
+               validator=validator)
     return text
 
 
-def get_plant_squares(plant, squares, north=1, west=1):
+def get_plant_squares(plant, squares, north=1, west=1, toolbar=None):
     """
     Prompt for the squares to devote to this plant
     """
 
     validator = PlantSquareValidator(north * west)
-    answer = prompt('Number of squares for {} ({} remaining): '.format(plant, squares),
-                    validator=validator)
+    answer = ask('Number of squares for {} ({} remaining): '.format(plant, squares),
+                 toolbar, validator=validator)
     return int(answer)
 
 
-def get_plant_trellises(plant, trellis):
+def get_plant_trellises(plant, trellis, toolbar=None):
     """
     Prompt for number of trellises for a plant
     """
     print('{} is grown on a trellis, enter number of *trellises* to use'.
           format(plant))
     print('{} trellises available'.format(trellis))
-    answer = prompt('Number of trellises: ', validator=NumberValidator())
+    answer = ask('Number of trellises: ', toolbar, validator=NumberValidator())
     return int(answer)*4, int(answer)
 
 
-def get_plant_list(plants, squares, trellis):
+def get_plant_list(plants, squares, trellis, preview=None):
     """
     Queries for all of the plant names and their amounts
+
+    If a LayoutPreview is given, a layout is generated in the background
+    after each plant and shown in a toolbar under the prompt.
     """
 
     plant_list = {}
     names = list(sorted(plants.keys()))
 
+    toolbar = None
+    if preview is not None:
+        def toolbar():
+            return preview.get_toolbar(squares, trellis)
+
     while True:
-        plant_name = get_plant(names)
+        plant_name = get_plant(names, toolbar)
         if plant_name == '' or squares == 0:
             break
 
+        plant_squares = 0
         if plants[plant_name].trellis:
             if trellis != 0:
-                plant_squares, trellis_used = get_plant_trellises(plant_name, trellis)
+                plant_squares, trellis_used = get_plant_trellises(plant_name, trellis,
+                                                                  toolbar)
                 trellis -= trellis_used
             else:
                 print('{} requires a trellis, but no trellises available'.format(plant_name))
         else:
             plant_squares = get_plant_squares(plant_name, squares,
-                                              *plants[plant_name].get_size())
+                                              *plants[plant_name].get_size(),
+                                              toolbar=toolbar)
         if plant_squares != 0:
             plant_list[plant_name] = plant_squares
+            if preview is not None:
+                preview.submit(plant_list)
 
         squares -= plant_squares
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Lazily loaded plant database
+
+The YAML files are only scanned for where each plant's entry starts and
+ends. An entry is parsed into a PlantInfo the first time it is looked up,
+and only a bounded number of them are kept.
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import threading
+import yaml
+from plant_info import PlantInfo
+
+STRING_TAG = 'tag:yaml.org,2002:str'
+
+
+def get_byte_offsets(text, offsets):
+    """
+    Converts increasing character offsets into text to offsets into its
+    UTF-8 encoding
+    """
+    converted = []
+    position = 0
+    size = 0
+    for offset in offsets:
+        size += len(text[position:offset].encode('utf-8'))
+        position = offset
+        converted.append(size)
+    return converted
+
+
+def index_plants_file(filename):
+    """
+    Finds the byte range of every top level entry in a YAML plants file
+
+    Returns a map of plant names to (start, end) offsets. The entries are
+    found in PyYAML's event stream, so comments or flow style values don't
+    get in the way. Each entry runs from the start of the line with its name
+    to the next name.
+
+    Raises a ValueError if the file isn't a single block style mapping of
+    plant names, like plants.yaml, or if it uses aliases, as an entry has
+    to be readable on its own. Names that YAML reads as anything other than
+    a string, like 2024 or yes, raise it too, as the entry couldn't be
+    looked up by its name once loaded.
+    """
+    with open(filename, 'rb') as plants_doc:
+        text = plants_doc.read().decode('utf-8')
+
+    resolver = yaml.resolver.Resolver()
+    names = []
+    offsets = []
+    depth = 0
+    documents = 0
+    name = None
+    for event in yaml.parse(text):
+        if isinstance(event, yaml.AliasEvent):
+            raise ValueError('{}: aliases are not supported, at line {}'
+                             .format(filename, event.start_mark.line + 1))
+        if isinstance(event, yaml.DocumentStartEvent):
+            documents += 1
+            if documents > 1:
+                raise ValueError('{}: only one document is supported'
+                                 .format(filename))
+
+        # Every other event at the top level is the name of a plant
+        if depth == 1 and name is None:
+            if isinstance(event, yaml.ScalarEvent):
+                mark = event.start_mark
+                start = mark.index - mark.column
+                if text[start:mark.index].strip():
+                    raise ValueError('{}: {} must start its own line'
+                                     .format(filename, event.value))
+                tag = event.tag
+                if tag is None or tag == '!':
+                    tag = resolver.resolve(yaml.ScalarNode, event.value,
+                                           event.implicit)
+                if tag != STRING_TAG:
+                    raise ValueError('{}: plant names must be strings, {} at '
+                                     'line {} is read as {}'.format(
+                                         filename, event.value, mark.line + 1,
+                                         tag))
+                name = event.value
+                names.append(name)
+                offsets.append(start)
+                continue
+            if not isinstance(event, yaml.MappingEndEvent):
+                raise ValueError('{}: plant names must be plain values, at '
+                                 'line {}'.format(filename,
+                                                  event.start_mark.line + 1))
+
+        if isinstance(event, yaml.CollectionStartEvent):
+            if depth == 0 and (not isinstance(event, yaml.MappingStartEvent)
+                               or event.flow_style):
+                raise ValueError('{}: must be a block style mapping of plant '
+                                 'names'.format(filename))
+            depth += 1
+        elif isinstance(event, yaml.CollectionEndEvent):
+            depth -= 1
+            if depth == 0:
+                offsets.append(event.start_mark.index)
+        elif isinstance(event, yaml.ScalarEvent) and depth == 0 and \
+                event.value:
+            raise ValueError('{}: must be a block style mapping of plant '
+                             'names'.format(filename))
+
+        # The plant's settings are done once back at the top level
+        if depth == 1:
+            name = None
+
+    offsets = get_byte_offsets(text, offsets)
+    return {name: (offsets[i], offsets[i + 1]) for i, name in enumerate(names)}
+
+
+class PlantDatabase(Mapping):
+    """
+    A read only map of plant names to PlantInfo, loaded on demand from one
+    or more YAML files
+
+    Later files are overlays: their settings for a plant replace the
+    settings of the same name in earlier files.
+    """
+
+    def __init__(self, filenames, cache_size=128):
+        self.filenames = list(filenames)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Plant name to the (file, start, end) of each of its entries
+        self.locations = {}
+        for i, filename in enumerate(self.filenames):
+            for name, (start, end) in index_plants_file(filename).items():
+                self.locations.setdefault(name, []).append((i, start, end))
+
+    def __getitem__(self, name):
+        with self.lock:
+            if name in self.cache:
+                self.cache.move_to_end(name)
+                return self.cache[name]
+
+        plant = PlantInfo(name, self.load_config(name))
+
+        with self.lock:
+            self.cache[name] = plant
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return plant
+
+    def __contains__(self, name):
+        return name in self.locations
+
+    def __iter__(self):
+        return iter(self.locations)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def load_config(self, name):
+        """
+        Parses the entries for a plant, merging the overlays in order
+        """
+        config = {}
+        for i, start, end in self.locations[name]:
+            with open(self.filenames[i], 'rb') as plants_doc:
+                plants_doc.seek(start)
+                entry = yaml.safe_load(plants_doc.read(end - start))
+            config.update(entry[name] or {})
+        return config
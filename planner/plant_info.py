@@ -5,6 +5,9 @@ Model for PlantInfo
 Contains planting details like spacing, beneficial/negative neighbours
 """
 
+# Height names in the plants db, shortest first
+HEIGHTS = {'short': 0, 'medium': 1, 'tall': 2}
+
 def _get_config(config, name, default):
     if name in config:
         return config[name]
@@ -29,6 +32,12 @@ class PlantInfo:
         """
         return self.size_north, self.size_west
 
+    def get_height_level(self):
+        """
+        Gets the height as a level, 0 being the shortest
+        """
+        return HEIGHTS.get(self.height, 0)
+
     def get_plants_per_square(self):
         """
         Gets the number of plants per square
@@ -3,6 +3,8 @@
 Library of plant definitions
 """
 
+import numpy as np
+
 
 class PlantLibrary:
     """
@@ -11,12 +13,27 @@ class PlantLibrary:
     def __init__(self, plants):
         self.plants = plants
 
+    def __contains__(self, plant):
+        return plant in self.plants
+
+    def get_size(self, plant):
+        """
+        Gets the north and west size of a plant
+        """
+        return self.plants[plant].get_size()
+
     def get_seeds_per_square(self, plant):
         """
         Gets the number of seeds / plants per square
         """
         return self.plants[plant].plants_north * self.plants[plant].plants_west
 
+    def get_height(self, plant):
+        """
+        Gets the height level of a plant, 0 being the shortest
+        """
+        return self.plants[plant].get_height_level()
+
     def get_companions(self, plant):
         """
         Gets the companions for a plant
@@ -34,16 +51,35 @@ class PlantLibrary:
         Returns a list of plants that require a trellis
         """
         return [plant
-                for plant in self.plants
-                if self.plants[plant].trellis and plant in names]
+                for plant in names
+                if plant in self.plants and self.plants[plant].trellis]
 
     def get_large_plants(self, names, trellised=False):
         """
         Returns a list of plants that require more than one square
         """
         return [plant
-                for plant in self.plants
-                if self.plants[plant].size_north > 1 and
+                for plant in names
+                if plant in self.plants and
+                self.plants[plant].size_north > 1 and
                 self.plants[plant].size_west > 1 and
-                plant in names and
                 self.plants[plant].trellis == trellised]
+
+    def get_relation_matrix(self, names):
+        """
+        Gets how each plant gets on with each other plant, indexed by the
+        position of the names: -1 for enemies, 1 for companions, otherwise 0.
+
+        A plant counts as its own enemy, as planting it together increases
+        the chance of pest infestation.
+        """
+        relation = np.zeros((len(names), len(names)), dtype=np.int8)
+        for i, plant in enumerate(names):
+            enemies = self.get_enemies(plant)
+            companions = self.get_companions(plant)
+            for j, other in enumerate(names):
+                if other == plant or other in enemies:
+                    relation[i, j] = -1
+                elif other in companions:
+                    relation[i, j] = 1
+        return relation
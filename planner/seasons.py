@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Plans the same garden over several successive seasons
+
+The layouts are kept as a stack of grids, one layer per season, in the
+plant codes shared by every season. Crop rotation means a square shouldn't
+get the same plant, or an enemy of the plant, that it had the season
+before. Rotation is checked by comparing whole layers at once.
+"""
+
+import numpy as np
+from garden import Garden, BENEFICIALS
+
+# Rank lost for each square of a footprint that breaks the rotation, for
+# when a plant has nowhere else left to go
+ROTATION_PENALTY = 10
+
+
+def get_conflict_matrix(relation):
+    """
+    Gets which plants can't follow each other in a square: the same plant,
+    or enemies in either direction
+    """
+    return (relation < 0) | (relation.T < 0)
+
+
+class RotationMap:
+    """
+    Squares each plant shouldn't go in, given last season's layer
+    """
+
+    def __init__(self, conflict, previous):
+        self.conflict = conflict
+        self.previous = previous
+        self.tables = {}
+        self.allowed = {}
+
+    def get_table(self, plant):
+        """
+        Gets the summed area table of the squares that would break the
+        rotation for the plant
+        """
+        if plant not in self.tables:
+            blocked = (self.previous >= 0) & \
+                self.conflict[plant, self.previous]
+            table = np.zeros((blocked.shape[0] + 1, blocked.shape[1] + 1),
+                             dtype=np.int32)
+            table[1:, 1:] = blocked.cumsum(axis=0).cumsum(axis=1)
+            self.tables[plant] = table
+        return self.tables[plant]
+
+    def get_allowed(self, plant):
+        """
+        Gets which squares the plant can go in without breaking the
+        rotation
+        """
+        if plant not in self.allowed:
+            table = self.get_table(plant)
+            self.allowed[plant] = (table[1:, 1:] - table[:-1, 1:] -
+                                   table[1:, :-1] + table[:-1, :-1]) == 0
+        return self.allowed[plant]
+
+    def get_penalty(self, plant, origins, dimensions):
+        """
+        Gets the penalty at each origin for the squares of the footprint
+        that would break the rotation
+        """
+        table = self.get_table(plant)
+        origins = np.asarray(origins).reshape(-1, 2)
+        north = origins[:, 0]
+        west = origins[:, 1]
+        south = north + dimensions[0]
+        east = west + dimensions[1]
+        return ROTATION_PENALTY * (table[south, east] - table[north, east] -
+                                   table[south, west] + table[north, west])
+
+
+class SeasonPlanner:
+    """
+    Generates one layout per season for the same garden, each following
+    the rotation of the season before
+    """
+
+    def __init__(self, library, north, west, cross_box=False):
+        self.library = library
+        self.north = north
+        self.west = west
+        self.cross_box = cross_box
+        self.layers = None
+        self.conflict = None
+
+    def plan(self, seasons):
+        """
+        Generates the layouts for a list of preferences, one per season
+
+        Returns a list of Gardens. Every season shares the scoring state of
+        the first, so the relation matrix is only built once.
+        """
+        names = []
+        for preferences in seasons:
+            names += [plant for plant in preferences if plant not in names]
+        names += [plant for plant in BENEFICIALS if plant not in names]
+
+        gardens = []
+        for i, preferences in enumerate(seasons):
+            garden = Garden(self.library, self.north, self.west,
+                            self.cross_box)
+            if i == 0:
+                garden.prepare_scoring(names)
+                self.conflict = get_conflict_matrix(garden.relation)
+                self.layers = np.full((len(seasons),) + garden.grid.shape, -1,
+                                      dtype=garden.grid.dtype)
+            else:
+                garden.share_scoring(gardens[0])
+                garden.rotation = RotationMap(self.conflict,
+                                              self.layers[i - 1])
+
+            garden.generate(preferences)
+            self.layers[i] = garden.grid
+            gardens.append(garden)
+
+        return gardens
+
+    def get_conflicts(self):
+        """
+        Gets the number of squares that break the rotation going into each
+        season after the first
+        """
+        current = self.layers[1:]
+        previous = self.layers[:-1]
+        broken = (current >= 0) & (previous >= 0) & \
+            self.conflict[current, previous]
+        return broken.sum(axis=(1, 2))
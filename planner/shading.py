@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Garden-wide shading map
+
+Row 0 is the north edge of the garden, so a plant shades the shorter
+plants to its north, up to SHADOW rows away. For every height level the map
+keeps, for each square, how many squares of taller plants are in its
+shadow length to the south and how many squares of shorter plants are in
+its shadow length to the north. Both are prefix summed along each row so
+any footprint can be looked up in constant time, and a placement only
+updates the rows within a shadow length of it.
+"""
+
+import numpy as np
+from plant_info import HEIGHTS
+
+# Rows a plant shades to its north. Any further and the shade of one tall
+# plant outweighs how well it gets on with its neighbours.
+SHADOW = 2
+
+
+class ShadeMap:
+    """
+    Heights of the plants in every square, and the shade they cast
+    """
+
+    def __init__(self, rows, cols, levels=len(HEIGHTS)):
+        self.rows = rows
+        self.cols = cols
+        self.levels = np.arange(levels).reshape(levels, 1, 1)
+
+        # -1 where nothing is planted
+        self.heights = np.full((rows, cols), -1, dtype=np.int8)
+
+        # [level, row, col + 1] is summed over the columns west of col
+        self.received = np.zeros((levels, rows, cols + 1), dtype=np.int32)
+        self.cast = np.zeros((levels, rows, cols + 1), dtype=np.int32)
+
+    def place(self, height, origin, dimensions):
+        """
+        Records a plant of the given height level and updates the shade
+        """
+        self.heights[origin[0]:origin[0] + dimensions[0],
+                     origin[1]:origin[1] + dimensions[1]] = height
+        self.refresh(slice(origin[0], origin[0] + dimensions[0]))
+
+    def refresh(self, rows=slice(None)):
+        """
+        Recomputes the shade around the rows whose heights changed, all of
+        them by default
+        """
+        north, south, _ = rows.indices(self.rows)
+        north = max(north - SHADOW, 0)
+        south = min(south + SHADOW, self.rows)
+
+        # The heights a shadow length either side of the rows to update
+        first = max(north - SHADOW, 0)
+        heights = self.heights[first:min(south + SHADOW, self.rows)]
+        taller = np.zeros((len(self.levels), len(heights) + 1, self.cols),
+                          dtype=np.int32)
+        shorter = np.zeros_like(taller)
+        np.cumsum(heights > self.levels, axis=1, out=taller[:, 1:])
+        np.cumsum((heights >= 0) & (heights < self.levels), axis=1,
+                  out=shorter[:, 1:])
+
+        # Squares up to SHADOW rows strictly south (greater rows) or north
+        # of each square
+        row = np.arange(north, south) - first
+        received = taller[:, np.minimum(row + SHADOW + 1, len(heights))] - \
+            taller[:, row + 1]
+        cast = shorter[:, row] - shorter[:, np.maximum(row - SHADOW, 0)]
+
+        np.cumsum(received, axis=2, out=self.received[:, north:south, 1:])
+        np.cumsum(cast, axis=2, out=self.cast[:, north:south, 1:])
+
+    def get_penalty(self, height, origins, dimensions):
+        """
+        Gets the shade at each origin for a plant of the given height level:
+        squares of taller plants shading its footprint from the south, plus
+        squares of shorter plants it would shade to the north
+        """
+        origins = np.asarray(origins).reshape(-1, 2)
+        west = origins[:, 1]
+        east = west + dimensions[1]
+        southmost = origins[:, 0] + dimensions[0] - 1
+        northmost = origins[:, 0]
+
+        received = self.received[height]
+        cast = self.cast[height]
+        return (received[southmost, east] - received[southmost, west] +
+                cast[northmost, east] - cast[northmost, west])
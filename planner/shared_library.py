@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+PlantLibrary compiled into flat arrays in shared memory
+
+The library is compiled once into a sorted name table, a relation matrix
+and a column per attribute, all in one shared memory block. Worker
+processes attach to the block by name and read it in place, so a pool's
+memory and start up time don't grow with the size of the catalogue.
+
+Only relations between plants in the catalogue are kept, so enemies and
+companions that aren't in the catalogue are dropped.
+"""
+
+from bisect import bisect_left
+from multiprocessing import resource_tracker, shared_memory
+import sys
+import threading
+import numpy as np
+
+# Attribute columns, one int16 per plant each
+COLUMNS = ['size_north', 'size_west', 'plants_north', 'plants_west',
+           'height', 'trellis']
+
+# Number of plants and bytes of names
+HEADER = 2
+
+# Held while resource tracking is switched off to attach a block
+TRACKER_LOCK = threading.Lock()
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def get_layout(plants, names_size):
+    """
+    Gets the (offset, dtype, shape) of each array in the block, and the
+    size of the block
+    """
+    layout = {}
+    offset = 0
+    for name, dtype, shape in [
+            ('header', np.int64, (HEADER,)),
+            ('offsets', np.int32, (plants + 1,)),
+            ('names', np.uint8, (names_size,)),
+            ('relation', np.int8, (plants, plants)),
+            ('columns', np.int16, (len(COLUMNS), plants))]:
+        layout[name] = (offset, dtype, shape)
+        offset = _align(offset + np.dtype(dtype).itemsize *
+                        int(np.prod(shape)))
+    return layout, max(offset, 1)
+
+
+class NameTable:
+    """
+    Sorted plant names read straight out of the shared block
+    """
+
+    def __init__(self, offsets, names):
+        self.offsets = offsets
+        self.names = names
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.names[self.offsets[i]:self.offsets[i + 1]]).decode(
+            'utf-8')
+
+
+class SharedPlantLibrary:
+    """
+    A read only PlantLibrary view over a compiled shared memory block
+
+    Pickling a view only sends the name of the block, so views can be
+    passed to pool workers, which attach to the same memory.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+
+        header = np.ndarray((HEADER,), dtype=np.int64, buffer=shm.buf)
+        layout, _ = get_layout(int(header[0]), int(header[1]))
+        arrays = {}
+        for name, (offset, dtype, shape) in layout.items():
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                                      offset=offset)
+            arrays[name].flags.writeable = False
+
+        self.names = NameTable(arrays['offsets'], arrays['names'])
+        self.relation = arrays['relation']
+        self.columns = dict(zip(COLUMNS, arrays['columns']))
+
+    @classmethod
+    def create(cls, library):
+        """
+        Compiles a PlantLibrary into a new shared memory block
+
+        The creating process owns the block and should unlink it once the
+        workers are done.
+        """
+        names = sorted(library.plants)
+        index = {name: i for i, name in enumerate(names)}
+        encoded = [name.encode('utf-8') for name in names]
+
+        layout, size = get_layout(len(names), sum(len(n) for n in encoded))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+
+        def array(name):
+            offset, dtype, shape = layout[name]
+            return np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                              offset=offset)
+
+        array('header')[:] = [len(names), sum(len(n) for n in encoded)]
+        array('offsets')[:] = np.cumsum([0] + [len(n) for n in encoded])
+        array('names')[:] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        relation = array('relation')
+        relation[:] = 0
+        columns = array('columns')
+        for i, name in enumerate(names):
+            plant = library.plants[name]
+            for other in plant.companion:
+                if other in index:
+                    relation[i, index[other]] = 1
+            for other in plant.enemy:
+                if other in index:
+                    relation[i, index[other]] = -1
+
+            columns[:, i] = [plant.size_north, plant.size_west,
+                             plant.plants_north, plant.plants_west,
+                             plant.get_height_level(), bool(plant.trellis)]
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to a block created by another process
+
+        The block isn't registered with this process's resource tracker, as
+        the tracker would remove it when this process exits, leaving the
+        creator and any other workers without it.
+        """
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False))
+
+        # Unregistering afterwards would also drop the creator's entry when
+        # the tracker is shared with it, so don't register at all
+        with TRACKER_LOCK:
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                return cls(shared_memory.SharedMemory(name=name))
+            finally:
+                resource_tracker.register = register
+
+    def __reduce__(self):
+        return (SharedPlantLibrary.attach, (self.shm.name,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Detaches from the block, and removes it if this process created it
+        """
+        self.names = None
+        self.relation = None
+        self.columns = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def get_index(self, plant):
+        """
+        Gets the position of a plant in the name table
+        """
+        i = bisect_left(self.names, plant)
+        if i == len(self.names) or self.names[i] != plant:
+            raise KeyError(plant)
+        return i
+
+    def __contains__(self, plant):
+        i = bisect_left(self.names, plant)
+        return i < len(self.names) and self.names[i] == plant
+
+    def get_size(self, plant):
+        """
+        Gets the north and west size of a plant
+        """
+        i = self.get_index(plant)
+        return (int(self.columns['size_north'][i]),
+                int(self.columns['size_west'][i]))
+
+    def get_height(self, plant):
+        """
+        Gets the height level of a plant, 0 being the shortest
+        """
+        return int(self.columns['height'][self.get_index(plant)])
+
+    def get_seeds_per_square(self, plant):
+        """
+        Gets the number of seeds / plants per square
+        """
+        i = self.get_index(plant)
+        return int(self.columns['plants_north'][i]) * \
+            int(self.columns['plants_west'][i])
+
+    def get_companions(self, plant):
+        """
+        Gets the companions for a plant
+        """
+        row = self.relation[self.get_index(plant)]
+        return [self.names[i] for i in np.flatnonzero(row > 0)]
+
+    def get_enemies(self, plant):
+        """
+        Gets the enemies for a plant
+        """
+        row = self.relation[self.get_index(plant)]
+        return [self.names[i] for i in np.flatnonzero(row < 0)]
+
+    def get_trellised(self, names):
+        """
+        Returns a list of plants that require a trellis
+        """
+        return [plant
+                for plant in names
+                if plant in self and
+                self.columns['trellis'][self.get_index(plant)]]
+
+    def get_large_plants(self, names, trellised=False):
+        """
+        Returns a list of plants that require more than one square
+        """
+        large = []
+        for plant in names:
+            if plant not in self:
+                continue
+            i = self.get_index(plant)
+            if self.columns['size_north'][i] > 1 and \
+                    self.columns['size_west'][i] > 1 and \
+                    bool(self.columns['trellis'][i]) == trellised:
+                large.append(plant)
+        return large
+
+    def get_relation_matrix(self, names):
+        """
+        Gets how each plant gets on with each other plant, as
+        PlantLibrary.get_relation_matrix does
+        """
+        indices = [self.get_index(plant) for plant in names]
+        relation = self.relation[np.ix_(indices, indices)].copy()
+        np.fill_diagonal(relation, -1)
+        return relation
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Trace of placement decisions
+
+Each placement is written into a preallocated ring buffer: which plant went
+into which box and where, how many candidate origins there were, the best
+and worst candidate ranks and which candidate was drawn. A full
+trace can be saved, loaded and replayed to rebuild the layout without
+searching. Rollbacks are recorded too, so placements that were undone are
+undone again on replay.
+"""
+
+import numpy as np
+
+# Phases of generation, in the order Garden runs them
+PHASES = ['trellised', 'large', 'pattern', 'single', 'beneficial', 'replay',
+          'rollback']
+
+RECORD = np.dtype([
+    ('phase', np.uint8),
+    ('plant', np.int16),
+    ('box', np.int16),
+    ('row', np.uint8),
+    ('col', np.uint8),
+    ('size_north', np.uint8),
+    ('size_west', np.uint8),
+    # Candidate origins, how many tied for the best rank, and which was
+    # drawn as its position among the candidates best first. For a
+    # rollback, candidates is the number of placements undone.
+    ('candidates', np.uint16),
+    ('tied', np.uint16),
+    ('draw', np.uint16),
+    ('best', np.float32),
+    ('worst', np.float32),
+])
+
+
+class PlacementTrace:
+    """
+    Ring buffer of the last capacity placements
+    """
+
+    def __init__(self, capacity=4096, shape=None):
+        self.records = np.zeros(capacity, dtype=RECORD)
+        self.count = 0
+        self.dropped = 0
+        self.names = []
+        self.codes = {}
+
+        # North and west boxes in the garden being traced
+        self.shape = shape
+
+    def __len__(self):
+        return min(self.count, len(self.records))
+
+    def get_dropped(self):
+        """
+        Gets the number of placements overwritten by newer ones
+        """
+        return self.dropped + max(0, self.count - len(self.records))
+
+    def record(self, phase, plant, box, origin, dimensions, decision=None):
+        """
+        Records a placement. decision is (candidates, tied, draw, best,
+        worst) when the origin was searched for.
+        """
+        if plant not in self.codes:
+            self.codes[plant] = len(self.names)
+            self.names.append(plant)
+
+        if decision is None:
+            decision = (0, 0, 0, 0, 0)
+        self.records[self.count % len(self.records)] = (
+            PHASES.index(phase), self.codes[plant], box, origin[0], origin[1],
+            dimensions[0], dimensions[1]) + tuple(decision)
+        self.count += 1
+
+    def record_rollback(self, placements):
+        """
+        Records that the newest placements were undone
+        """
+        self.records[self.count % len(self.records)] = (
+            PHASES.index('rollback'), -1, -1, 0, 0, 0, 0, placements, 0, 0, 0,
+            0)
+        self.count += 1
+
+    def get_records(self):
+        """
+        Gets the recorded placements, oldest first
+        """
+        start = self.count % len(self.records)
+        if self.count <= len(self.records):
+            return self.records[:self.count]
+        return np.concatenate((self.records[start:], self.records[:start]))
+
+    def save(self, filename):
+        """
+        Writes the placements to a compressed .npz file
+        """
+        np.savez_compressed(filename,
+                            records=self.get_records(),
+                            names=np.array(self.names, dtype=str),
+                            shape=np.array(self.shape or (0, 0)),
+                            dropped=self.get_dropped())
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads placements written by save
+        """
+        with np.load(filename) as data:
+            records = data['records']
+            shape = tuple(int(boxes) for boxes in data['shape'])
+            trace = cls(max(len(records), 1),
+                        shape if shape != (0, 0) else None)
+            trace.records[:len(records)] = records
+            trace.count = len(records)
+            trace.names = [str(name) for name in data['names']]
+            trace.codes = {name: i for i, name in enumerate(trace.names)}
+            trace.dropped = int(data['dropped'])
+        return trace
+
+    def replay(self, garden):
+        """
+        Places every traced plant into an empty garden of the same shape
+
+        Raises a ValueError if the garden isn't the shape that was traced,
+        or if the oldest placements have been overwritten, as the layout
+        can't be rebuilt without them.
+        """
+        if self.shape is not None and \
+                tuple(self.shape) != (garden.north, garden.west):
+            raise ValueError('Trace is of a {}x{} garden, not {}x{}'.format(
+                self.shape[0], self.shape[1], garden.north, garden.west))
+        if self.get_dropped():
+            raise ValueError('Trace is missing its oldest placements')
+
+        garden.prepare_scoring(self.names)
+        garden.phase = 'replay'
+
+        # Where the garden stood before each placement still in it
+        checkpoints = []
+        for record in self.get_records():
+            if PHASES[record['phase']] == 'rollback':
+                undone = int(record['candidates'])
+                garden.rollback(checkpoints[-undone])
+                del checkpoints[-undone:]
+                continue
+
+            checkpoints.append(garden.checkpoint())
+            box = garden.boxes[record['box'] // garden.west][
+                record['box'] % garden.west]
+            garden.place_plant(box, self.names[record['plant']],
+                               (int(record['row']), int(record['col'])),
+                               (int(record['size_north']),
+                                int(record['size_west'])))
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# The planner modules import each other by module name, as when they are
+# run from the planner directory. Appended so the planner package itself
+# still wins over planner/planner.py
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'planner'))
+
+import pytest
+from planner.plant_info import PlantInfo
+from planner.plant_library import PlantLibrary
+
+
+@pytest.fixture
+def make_library():
+    """
+    Builds a PlantLibrary from a map of plant names to their config
+    """
+    def make(config):
+        return PlantLibrary({p: PlantInfo(p, config[p]) for p in config})
+    return make
@@ -0,0 +1,59 @@
+import numpy as np
+from planner.adjacency import AdjacencyGraph, get_graph
+
+
+def test_neighbours():
+    graph = AdjacencyGraph(1, 2)
+
+    # Corner, edge and middle of the west box
+    assert len(graph.get_neighbours(graph.get_index(0, 0))) == 3
+    assert len(graph.get_neighbours(graph.get_index(0, 1))) == 5
+    assert len(graph.get_neighbours(graph.get_index(1, 1))) == 8
+
+    # East edge of the west box touches the east box
+    east = graph.get_neighbours(graph.get_index(1, 3))
+    assert graph.get_index(1, 4) in east
+    assert len(east) == 8
+
+
+def test_boxes_apart():
+    graph = AdjacencyGraph(1, 2, cross_box=False)
+
+    east = graph.get_neighbours(graph.get_index(1, 3))
+    assert graph.get_index(1, 4) not in east
+    assert len(east) == 5
+
+
+def test_graph_is_shared():
+    assert get_graph(2, 3) is get_graph(2, 3)
+    assert get_graph(2, 3) is not get_graph(2, 3, cross_box=False)
+
+
+def test_score():
+    relation = np.array([[-1, 1], [1, -1]], dtype=np.int8)
+
+    for cross_box, expected in ((False, 0), (True, 2)):
+        graph = AdjacencyGraph(1, 2, cross_box=cross_box)
+        codes = np.full(graph.rows * graph.cols, -1)
+        codes[graph.get_index(0, 3)] = 0
+        codes[graph.get_index(0, 4)] = 1
+        assert graph.score(codes, relation) == expected
+
+        ranks = graph.rank_origins(codes, relation, 0, [(1, 4), (3, 0)],
+                                   (1, 1))
+        assert list(ranks) == [1 - int(cross_box), 0]
+
+
+def test_score_groups():
+    relation = np.array([[-1]], dtype=np.int8)
+    graph = AdjacencyGraph(1, 1)
+    codes = np.full(graph.rows * graph.cols, -1)
+    groups = np.full(graph.rows * graph.cols, -1)
+    for i in range(2):
+        for j in range(2):
+            codes[graph.get_index(i, j)] = 0
+            groups[graph.get_index(i, j)] = 0
+
+    # Each of the four squares touches the other three
+    assert graph.score(codes, relation) == -12
+    assert graph.score(codes, relation, groups) == 0
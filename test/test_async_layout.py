@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import pytest
+from planner import async_layout
+from planner.async_layout import generate_layout
+
+
+PLANTS = {
+    'carrot': {'companion': ['onion']},
+    'onion': {},
+    'squash': {'size_north': 2, 'size_west': 2},
+    'pumpkin': {'size_north': 3, 'size_west': 3},
+    'zucchini': {'size_north': 2, 'size_west': 3},
+    'melon': {'size_north': 3, 'size_west': 2},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def test_generate_layout(make_library):
+    events = []
+    result = asyncio.run(generate_layout(make_library(PLANTS), 1, 2,
+                                         {'carrot': 10, 'onion': 6},
+                                         progress=events.append))
+
+    assert result.complete
+    assert result.reason is None
+    assert [event.placed for event in events][:16] == list(range(1, 17))
+    assert events[0].phase == 'single'
+    assert events[-1].phase == 'beneficial'
+    assert events[-1].running_score == result.garden.score()
+
+
+def test_cancelled(make_library):
+    cancel = threading.Event()
+    cancel.set()
+    result = asyncio.run(generate_layout(make_library(PLANTS), 1, 1,
+                                         {'carrot': 4}, cancel=cancel))
+
+    assert not result.complete
+    assert 'cancelled' in result.reason
+    assert result.garden.placed == 0
+
+
+def test_timeout(make_library):
+    result = asyncio.run(generate_layout(make_library(PLANTS), 1, 1,
+                                         {'carrot': 4}, timeout=-1))
+
+    assert not result.complete
+    assert 'time' in result.reason
+
+
+def test_partial_layout(make_library):
+    # Both fit on their own and pass the up-front checks, but whichever
+    # goes first leaves the other only one column
+    result = asyncio.run(generate_layout(make_library(PLANTS), 1, 1,
+                                         {'zucchini': 6, 'melon': 6}))
+
+    assert not result.complete
+    assert "Couldn't fit" in result.reason
+    assert result.garden.phase == 'large'
+
+
+def test_infeasible(make_library):
+    # Raised before anything is placed, so there's no layout to return
+    with pytest.raises(async_layout.GardenLayoutException,
+                       match='17 squares requested'):
+        asyncio.run(generate_layout(make_library(PLANTS), 1, 1,
+                                    {'carrot': 17}))
@@ -35,3 +35,31 @@ def test_box_place_plant():
 
     # TODO: Correct placement
     # TODO: Failed placement
+
+
+def test_box_rollback():
+    box = Box(4, 4)
+    box.place_plant('carrot', (0, 0), (1, 2))
+    checkpoint = box.checkpoint()
+
+    box.place_plant('squash', (0, 1), (2, 2))
+    assert box.squares[0][1] == 'squash'
+
+    restored = box.rollback(checkpoint)
+    assert len(restored) == 4
+    assert box.squares[0] == ['carrot', 'carrot', None, None]
+    assert box.squares[1] == [None, None, None, None]
+
+    box.rollback(0)
+    assert len(box.check_fit(1, 1)) == 16
+
+
+def test_box_check_fit():
+    box = Box(4, 4)
+    assert len(box.check_fit(2, 2)) == 9
+    assert box.check_fit(4, 4) == [(0, 0)]
+
+    box.place_plant('squash', (0, 0), (2, 2))
+    assert (0, 2) in box.check_fit(2, 2)
+    assert (1, 1) not in box.check_fit(2, 2)
+
@@ -0,0 +1,103 @@
+from planner.constraints import find_infeasibility, get_min_separator
+
+
+PLANTS = {
+    'carrot': {},
+    'onion': {},
+    'bean': {'trellis': True, 'size_north': 1, 'size_west': 4},
+    'squash': {'size_north': 2, 'size_west': 2},
+    'pumpkin': {'size_north': 3, 'size_west': 3},
+    'watermelon': {'size_north': 3, 'size_west': 4},
+    'garlic': {'enemy': ['pea']},
+    'pea': {},
+}
+
+
+def test_feasible(make_library):
+    library = make_library(PLANTS)
+    assert find_infeasibility(library, 1, 2, {
+        'carrot': 8,
+        'bean': 4,
+        'squash': 8,
+    }) is None
+
+
+def test_unknown_plant(make_library):
+    reason = find_infeasibility(make_library(PLANTS), 1, 1, {'kale': 1})
+    assert 'kale' in reason
+
+
+def test_too_many_squares(make_library):
+    reason = find_infeasibility(make_library(PLANTS), 1, 1, {'carrot': 17})
+    assert '17 squares requested' in reason
+
+
+def test_trellises(make_library):
+    library = make_library(PLANTS)
+
+    # 6 squares used to pass, but needs two trellis rows
+    assert find_infeasibility(library, 1, 1, {'bean': 6}) is not None
+    assert find_infeasibility(library, 1, 1, {'bean': 8}) is not None
+    assert find_infeasibility(library, 1, 2, {'bean': 8}) is None
+
+
+def test_footprints(make_library):
+    library = make_library(PLANTS)
+
+    assert find_infeasibility(library, 1, 1, {'squash': 16}) is None
+
+    # The trellis leaves room for only two 2x2 plants
+    reason = find_infeasibility(library, 1, 1, {'squash': 12, 'bean': 4})
+    assert 'Only room for 2' in reason
+
+    reason = find_infeasibility(library, 1, 1, {'squash': 4}, 1, 4)
+    assert "doesn't fit" in reason
+
+
+def test_large_footprints(make_library):
+    library = make_library(PLANTS)
+
+    # Each fits on its own, but a pumpkin leaves no room for a squash
+    reason = find_infeasibility(library, 1, 1, {'pumpkin': 9, 'squash': 4})
+    assert 'beside the larger ones' in reason
+    assert find_infeasibility(library, 1, 2,
+                              {'pumpkin': 9, 'squash': 16}) is None
+
+    # Two of either size fit, but not three between them
+    reason = find_infeasibility(library, 1, 2, {'pumpkin': 18,
+                                                'watermelon': 12})
+    assert 'over half a box' in reason
+
+    # The trellised box still has room for a pumpkin under the trellis
+    assert find_infeasibility(library, 1, 2, {'pumpkin': 9, 'squash': 16,
+                                              'bean': 4}) is None
+    reason = find_infeasibility(library, 1, 2, {'pumpkin': 18, 'squash': 4,
+                                                'bean': 4})
+    assert 'beside the larger ones' in reason
+
+
+def test_enemies(make_library):
+    library = make_library(PLANTS)
+
+    # Different boxes keep them apart
+    assert find_infeasibility(library, 1, 2, {'garlic': 16, 'pea': 16}) is None
+
+    assert find_infeasibility(library, 1, 1, {'garlic': 10, 'pea': 3}) is None
+    reason = find_infeasibility(library, 1, 1, {'garlic': 10, 'pea': 4})
+    assert 'enemies' in reason
+
+    # Other plants can go between them
+    assert find_infeasibility(library, 1, 1,
+                              {'garlic': 12, 'pea': 1, 'carrot': 3}) is None
+
+    # A touching garden is one grid with plenty of spare squares
+    assert find_infeasibility(library, 2, 3,
+                              {'garlic': 40, 'pea': 4, 'carrot': 50},
+                              cross_box=True) is None
+
+
+def test_min_separator():
+    assert get_min_separator(2, 2) is None
+    assert get_min_separator(1, 3) == 1
+    assert get_min_separator(2, 8) == 2
+    assert get_min_separator(4, 4) == 3
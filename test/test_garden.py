@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from planner.garden import Garden, GardenLayoutException
+
+
+PLANTS = {
+    'carrot': {},
+    'squash': {'size_north': 2, 'size_west': 2, 'height': 'tall'},
+    'melon': {'size_north': 2, 'size_west': 2, 'enemy': ['squash']},
+    'pumpkin': {'size_north': 3, 'size_west': 3},
+    'bean': {'trellis': True, 'size_north': 1, 'size_west': 4},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def get_squares(garden):
+    return [[box.squares for box in row] for row in garden.boxes]
+
+
+def test_large_plants_fill_box(make_library):
+    library = make_library(PLANTS)
+
+    # Every footprint has to be on the grid, which a single pass without
+    # backtracking often missed
+    for _ in range(50):
+        garden = Garden(library, 1, 1)
+        garden.generate({'squash': 16})
+        assert all(square == 'squash'
+                   for row in garden.boxes[0][0].squares
+                   for square in row)
+
+
+def test_large_plants_exact_fit(make_library):
+    library = make_library(PLANTS)
+    for _ in range(10):
+        garden = Garden(library, 1, 2)
+        garden.generate({'squash': 12, 'melon': 12, 'bean': 4})
+        squares = [square
+                   for row in garden.boxes[0]
+                   for line in row.squares
+                   for square in line]
+        assert squares.count('squash') == 12
+        assert squares.count('melon') == 12
+
+
+def test_large_plants_blocked(make_library):
+    garden = Garden(make_library(PLANTS), 1, 1)
+    garden.requested = {'pumpkin': 9, 'squash': 4}
+    garden.prepare_scoring(['pumpkin', 'squash'])
+
+    # The pumpkin fits, it's the squash left without room beside it
+    with pytest.raises(GardenLayoutException, match='fit squash'):
+        garden.place_large_plants()
+    assert garden.attempts < 10
+
+
+def test_count_room(make_library):
+    garden = Garden(make_library(PLANTS), 1, 2)
+    garden.prepare_scoring(['squash'])
+    assert garden.count_room((2, 2)).tolist() == [[4, 4]]
+    assert garden.count_room((3, 3)).tolist() == [[1, 1]]
+
+    # Squashes in the middle of a box leave no whole 2x2 quarter free
+    garden.place_plant(garden.boxes[0][0], 'squash', (1, 1), (2, 2))
+    assert garden.count_room((2, 2)).tolist() == [[0, 4]]
+    assert garden.count_room((1, 1)).tolist() == [[12, 16]]
+
+    # Only origins after the square at (0, 6)
+    assert garden.count_room((2, 2), 6).tolist() == [[0, 2]]
+
+
+def test_rollback(make_library):
+    garden = Garden(make_library(PLANTS), 1, 1)
+    garden.requested = {'carrot': 2, 'squash': 4}
+    garden.prepare_scoring(['carrot', 'squash'])
+    box = garden.boxes[0][0]
+
+    garden.place_plant(box, 'carrot', (0, 0), (1, 1))
+    garden.record_placed_plant('carrot', 1)
+
+    requested = dict(garden.requested)
+    squares = get_squares(garden)
+    grid = garden.grid.copy()
+    heights = garden.shade.heights.copy()
+    received = garden.shade.received.copy()
+    cast = garden.shade.cast.copy()
+
+    checkpoint = garden.checkpoint()
+    garden.place_plant(box, 'squash', (0, 1), (2, 2))
+    garden.record_placed_plant('squash', 4)
+    garden.place_plant(box, 'carrot', (3, 3), (1, 1))
+    garden.record_placed_plant('carrot', 1)
+    assert 'squash' not in garden.requested
+
+    garden.rollback(checkpoint)
+    assert garden.requested == requested
+    assert get_squares(garden) == squares
+    assert np.array_equal(garden.grid, grid)
+    assert np.array_equal(garden.shade.heights, heights)
+    assert np.array_equal(garden.shade.received, received)
+    assert np.array_equal(garden.shade.cast, cast)
+    assert garden.placed == 1
+
+
+def test_generate_large_plant(make_library):
+    for _ in range(20):
+        garden = Garden(make_library(PLANTS), 1, 1)
+        garden.generate({'squash': 4, 'carrot': 12})
+
+        # The footprint is whole and inside the box
+        rows, cols = np.nonzero(garden.grid == garden.plant_codes['squash'])
+        assert len(rows) == 4
+        assert rows.max() - rows.min() == 1
+        assert cols.max() - cols.min() == 1
+
+
+def test_score_large_plant(make_library):
+    garden = Garden(make_library(PLANTS), 1, 1)
+    garden.prepare_scoring(['squash'])
+    box = garden.boxes[0][0]
+
+    # A squash doesn't count against itself, only against another squash
+    checkpoint = garden.checkpoint()
+    garden.place_plant(box, 'squash', (0, 0), (2, 2))
+    assert garden.score() == 0
+    garden.place_plant(box, 'squash', (0, 2), (2, 2))
+    assert garden.score() == -8
+
+    garden.rollback(checkpoint)
+    assert (garden.footprints < 0).all()
+
+
+def test_running_score(make_library):
+    library = make_library(PLANTS)
+    for _ in range(10):
+        garden = Garden(library, 2, 2, cross_box=True)
+        garden.generate({'carrot': 20, 'squash': 8, 'melon': 4, 'bean': 4})
+        assert garden.running_score == garden.score()
+
+    garden = Garden(library, 1, 1)
+    garden.prepare_scoring(['carrot', 'squash'])
+    box = garden.boxes[0][0]
+    garden.place_plant(box, 'carrot', (0, 0), (1, 1))
+    checkpoint = garden.checkpoint()
+    garden.place_plant(box, 'squash', (0, 1), (2, 2))
+    garden.place_plant(box, 'carrot', (1, 0), (1, 1))
+    assert garden.running_score == garden.score()
+
+    garden.rollback(checkpoint)
+    assert garden.running_score == garden.score() == 0
@@ -0,0 +1,82 @@
+import pytest
+from planner.garden import Garden
+from planner.patterns import (PatternTable, build_pattern_table,
+                              count_mixes, enumerate_mixes, get_mix_key,
+                              split_quotas)
+from planner.trace import PHASES, PlacementTrace
+
+
+PLANTS = {
+    'carrot': {'companion': ['onion']},
+    'onion': {'companion': ['carrot']},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def test_mixes():
+    assert get_mix_key({'onion': 2, 'carrot': 1, 'kale': 0}, 4) == \
+        (('carrot', 1), ('onion', 2), (None, 1))
+    assert get_mix_key({'onion': 2, 'carrot': 2}, 4) == \
+        (('carrot', 2), ('onion', 2))
+
+    mixes = list(enumerate_mixes(['carrot', 'onion', 'pea'], 4))
+    assert len(mixes) == 15
+    assert all(sum(mix.values()) == 4 for mix in mixes)
+    assert count_mixes(2, 4) == 14
+
+    assert split_quotas({'carrot': 3, 'onion': 2}, 2, 4) == [
+        {'carrot': 2, 'onion': 1}, {'carrot': 1, 'onion': 1}]
+    assert split_quotas({'carrot': 9}, 2, 4) == [{'carrot': 4}, {'carrot': 4}]
+
+
+def test_table(tmp_path, make_library):
+    table = build_pattern_table(make_library(PLANTS), ['carrot', 'onion'], 2, 2,
+                                attempts=5)
+    assert len(table) == 14
+
+    fill = table.lookup({'onion': 2, 'carrot': 2})
+    assert sorted(fill[0] + fill[1]) == ['carrot', 'carrot', 'onion', 'onion']
+    fill = table.lookup({'onion': 1})
+    assert sorted(fill[0] + fill[1], key=str) == [None, None, None, 'onion']
+    assert table.lookup({'kale': 1}) is None
+
+    filename = str(tmp_path / 'table.json')
+    table.save(filename)
+    loaded = PatternTable.load(filename)
+    assert loaded.box_north == 2
+    assert loaded.patterns == table.patterns
+
+
+def test_garden_uses_table(make_library):
+    library = make_library(PLANTS)
+    table = PatternTable()
+    fill = [['carrot', 'onion'] * 2, ['onion', 'carrot'] * 2] * 2
+    table.add({'carrot': 8, 'onion': 8}, 0, fill)
+
+    garden = Garden(library, 1, 1)
+    garden.patterns = table
+    garden.generate({'carrot': 8, 'onion': 8})
+    assert garden.boxes[0][0].squares == fill
+
+
+def test_too_many_mixes(make_library):
+    with pytest.raises(ValueError):
+        build_pattern_table(make_library(PLANTS), list(PLANTS), max_mixes=100)
+
+
+def test_partial_fills(make_library):
+    library = make_library(PLANTS)
+    table = build_pattern_table(library, ['carrot', 'onion'], attempts=1)
+
+    # Each box gets an even share, leaving the rest empty
+    for count in (10, 14):
+        garden = Garden(library, 1, 2)
+        garden.patterns = table
+        garden.trace = PlacementTrace()
+        garden.generate({'carrot': count, 'onion': count})
+
+        phases = [PHASES[record['phase']]
+                  for record in garden.trace.get_records()]
+        assert phases.count('pattern') == 2 * count
+        assert 'single' not in phases
@@ -0,0 +1,87 @@
+import threading
+from planner.garden import Garden
+from planner.planner_ui import LayoutPreview, format_layout
+
+
+PLANTS = {
+    'carrot': {},
+    'onion': {},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def test_submit(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 4})
+    preview.thread.join()
+
+    assert preview.status == 'Layout OK'
+    assert sum(row.count('carrot')
+               for row in preview.layout.boxes[0][0].squares) == 4
+    assert 'Layout OK' in preview.get_toolbar(12, 1)
+
+
+def test_infeasible(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 17})
+
+    assert preview.thread is None
+    assert preview.status.startswith('Infeasible')
+    assert preview.layout is None
+
+
+def test_newer_run_cancels_older(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 4})
+    first = preview.cancel
+    preview.submit({'carrot': 4, 'onion': 4})
+    preview.thread.join()
+
+    assert first.is_set()
+    assert not preview.cancel.is_set()
+
+
+def test_stale_run_dropped(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 4})
+    preview.thread.join()
+    layout = preview.layout
+
+    # A run finishing after a newer submit doesn't replace its result
+    preview.generate({'onion': 4}, threading.Event())
+    assert preview.layout is layout
+    assert preview.status == 'Layout OK'
+
+
+def test_finish_reuses_layout(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 4})
+
+    # Waits for the run on the same list rather than starting over
+    layout = preview.finish({'carrot': 4})
+    assert layout is not None
+    assert layout is preview.layout
+
+
+def test_finish_cancels_other_list(make_library):
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 4})
+    cancel = preview.cancel
+
+    assert preview.finish({'carrot': 4, 'onion': 4}) is None
+    assert cancel.is_set()
+
+    preview = LayoutPreview(make_library(PLANTS), 1, 1)
+    preview.submit({'carrot': 17})
+    assert preview.finish({'carrot': 17}) is None
+
+
+def test_format_layout(make_library):
+    library = make_library(PLANTS)
+    assert len(format_layout(Garden(library, 1, 1))) == 4
+
+    lines = format_layout(Garden(library, 5, 5))
+    assert len(lines) == 2 * 4 + 1 + 1
+    assert lines[0].count('|') == 2
+    assert lines[-1] == '(2x3 of 5x5 boxes shown)'
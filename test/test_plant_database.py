@@ -0,0 +1,117 @@
+import pytest
+from planner.plant_database import PlantDatabase, index_plants_file
+
+BASE = '''---
+carrot:
+    plants_north: 4
+    companion:
+    - onion
+onion:
+    height: short
+
+squash:
+    size_north: 2
+    size_west: 2
+'''
+
+# Comments, quoted names and flow style settings
+STYLES = '''# Plants for the north beds
+carrot:  # root veg
+    plants_north: 4
+# Kept short
+"sweet pea":
+    companion: [carrot]
+kale: {height: tall}
+# Deep roots
+'pak choi': {}
+'''
+
+OVERLAY = '''carrot:
+    plants_north: 3
+kale:
+'''
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_index(tmp_path):
+    filename = write(tmp_path, 'plants.yaml', BASE)
+    index = index_plants_file(filename)
+
+    assert list(index) == ['carrot', 'onion', 'squash']
+    with open(filename) as plants_doc:
+        text = plants_doc.read()
+    start, end = index['onion']
+    assert text[start:end] == 'onion:\n    height: short\n\n'
+
+
+def test_lazy_lookup(tmp_path):
+    plants = PlantDatabase([write(tmp_path, 'plants.yaml', BASE)],
+                           cache_size=1)
+
+    assert len(plants) == 3
+    assert 'squash' in plants
+    assert len(plants.cache) == 0
+
+    assert plants['squash'].get_size() == (2, 2)
+    assert plants['carrot'].companion == ['onion']
+    assert list(plants.cache) == ['carrot']
+
+
+def test_overlay(tmp_path):
+    plants = PlantDatabase([write(tmp_path, 'plants.yaml', BASE),
+                            write(tmp_path, 'region.yaml', OVERLAY)])
+
+    assert sorted(plants) == ['carrot', 'kale', 'onion', 'squash']
+    assert plants['carrot'].plants_north == 3
+    assert plants['carrot'].companion == ['onion']
+    assert plants['kale'].get_size() == (1, 1)
+
+
+def test_styles(tmp_path):
+    filename = write(tmp_path, 'plants.yaml', STYLES)
+    index = index_plants_file(filename)
+    assert list(index) == ['carrot', 'sweet pea', 'kale', 'pak choi']
+
+    plants = PlantDatabase([filename])
+    assert plants['carrot'].plants_north == 4
+    assert plants['sweet pea'].companion == ['carrot']
+    assert plants['kale'].height == 'tall'
+    assert plants['pak choi'].get_size() == (1, 1)
+
+
+def test_unicode_offsets(tmp_path):
+    plants = PlantDatabase([write(tmp_path, 'plants.yaml',
+                                  'jalapeño:\n    height: short\n'
+                                  'onion:\n    height: tall\n')])
+    assert plants['jalapeño'].height == 'short'
+    assert plants['onion'].height == 'tall'
+
+
+@pytest.mark.parametrize('text', [
+    '{carrot: {}, onion: {}}\n',
+    '- carrot\n',
+    'carrot: &roots\n    height: short\nonion: *roots\n',
+    '? [carrot, onion]\n: {}\n',
+    'carrot:\n---\nonion:\n',
+    'carrot:\n2024:\n    height: short\n',
+    'yes: {}\n',
+    '~:\n',
+])
+def test_unsupported(tmp_path, text):
+    with pytest.raises(ValueError):
+        index_plants_file(write(tmp_path, 'plants.yaml', text))
+
+
+def test_string_names(tmp_path):
+    # Quoted or tagged, a number is read as the plant's name
+    plants = PlantDatabase([write(tmp_path, 'plants.yaml',
+                                  "'2024':\n    height: short\n"
+                                  "!!str 2025: {height: tall}\n")])
+    assert list(plants) == ['2024', '2025']
+    assert plants['2024'].height == 'short'
+    assert plants['2025'].height == 'tall'
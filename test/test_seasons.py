@@ -0,0 +1,66 @@
+import random
+import numpy as np
+from planner.seasons import SeasonPlanner, get_conflict_matrix
+
+
+PLANTS = {
+    'carrot': {},
+    'onion': {'enemy': ['pea']},
+    'pea': {},
+    'corn': {'height': 'tall'},
+    'bean': {'trellis': True, 'size_north': 1, 'size_west': 4},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def test_conflict_matrix():
+    relation = np.array([[-1, 0, 1], [-1, -1, 0], [0, 0, -1]])
+    assert get_conflict_matrix(relation).tolist() == [
+        [True, True, False],
+        [True, True, False],
+        [False, False, True],
+    ]
+
+
+def test_rotation(make_library):
+    random.seed(4)
+    planner = SeasonPlanner(make_library(PLANTS), 1, 2)
+    gardens = planner.plan([
+        {'carrot': 8, 'onion': 8},
+        {'carrot': 8, 'pea': 8},
+        {'onion': 12},
+    ])
+
+    assert planner.layers.shape == (3, 4, 8)
+    assert gardens[1].relation is gardens[0].relation
+
+    # Nothing follows itself or an enemy, wherever it would have to go
+    assert planner.get_conflicts().tolist() == [0, 0]
+
+
+def test_rotation_across_boxes(make_library):
+    library = make_library(PLANTS)
+    for seed in range(10):
+        random.seed(seed)
+        planner = SeasonPlanner(library, 1, 2)
+        planner.plan([{'onion': 16}, {'pea': 16}])
+        assert planner.get_conflicts().tolist() == [0]
+
+
+def test_rotation_outweighs_shade(make_library):
+    library = make_library(PLANTS)
+    for seed in range(10):
+        random.seed(seed)
+        planner = SeasonPlanner(library, 4, 1)
+        planner.plan([{'carrot': 24, 'corn': 24}] * 2)
+        assert planner.get_conflicts().tolist() == [0]
+
+
+def test_rotation_trellis(make_library):
+    library = make_library(PLANTS)
+    for seed in range(10):
+        random.seed(seed)
+        planner = SeasonPlanner(library, 1, 2)
+        planner.plan([{'bean': 4, 'carrot': 4}] * 2)
+        assert planner.get_conflicts().tolist() == [0]
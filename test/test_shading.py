@@ -0,0 +1,47 @@
+from planner.shading import SHADOW, ShadeMap
+
+
+def test_shade():
+    shade = ShadeMap(4, 4)
+    shade.place(2, (2, 1), (1, 2))
+
+    # Short plants north of the tall ones are shaded, south of them aren't
+    assert list(shade.get_penalty(0, [(0, 0), (0, 1), (1, 0), (3, 1)],
+                                  (1, 2))) == [1, 2, 1, 0]
+    assert list(shade.get_penalty(0, [(0, 1)], (2, 2))) == [2]
+
+    # Nothing is taller than a tall plant
+    assert list(shade.get_penalty(2, [(0, 1)], (1, 1))) == [0]
+
+    # A tall plant south of short ones shades them
+    shade.place(0, (1, 2), (1, 1))
+    assert list(shade.get_penalty(2, [(3, 2), (3, 3)], (1, 1))) == [1, 0]
+
+
+def test_shadow_length():
+    shade = ShadeMap(8, 1)
+    shade.place(2, (6, 0), (2, 1))
+
+    # Only the squares within a shadow length north of it are shaded
+    assert SHADOW == 2
+    penalty = shade.get_penalty(0, [(row, 0) for row in range(8)], (1, 1))
+    assert list(penalty) == [0, 0, 0, 0, 1, 2, 1, 0]
+    assert list(shade.get_penalty(2, [(3, 0)], (1, 1))) == [0]
+    shade.place(0, (2, 0), (1, 1))
+    assert list(shade.get_penalty(2, [(3, 0), (4, 0)], (1, 1))) == [1, 1]
+    assert list(shade.get_penalty(2, [(5, 0)], (1, 1))) == [0]
+
+
+def test_place_updates_rows():
+    shade = ShadeMap(8, 8)
+    shade.place(2, (5, 1), (2, 2))
+    shade.place(0, (0, 2), (1, 3))
+    shade.place(1, (3, 6), (2, 1))
+    received = shade.received.copy()
+    cast = shade.cast.copy()
+
+    # Updating only the rows around the footprint matches starting over
+    shade.refresh()
+    assert (shade.received == received).all()
+    assert (shade.cast == cast).all()
+    assert list(shade.get_penalty(0, [(0, 0), (4, 1)], (1, 4))) == [0, 4]
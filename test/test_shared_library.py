@@ -0,0 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+import subprocess
+import sys
+import numpy as np
+from planner import shared_library
+from planner.shared_library import SharedPlantLibrary
+
+
+PLANTS = {
+    'carrot': {'companion': ['onion', 'kale'], 'height': 'tall'},
+    'onion': {'enemy': ['bean'], 'plants_north': 4, 'plants_west': 4},
+    'bean': {'trellis': True, 'size_north': 1, 'size_west': 4},
+    'squash': {'size_north': 2, 'size_west': 2},
+}
+
+
+def get_enemies(library):
+    return library.get_enemies('onion')
+
+
+def test_same_queries(make_library):
+    library = make_library(PLANTS)
+    names = ['squash', 'bean', 'onion', 'carrot']
+
+    with SharedPlantLibrary.create(library) as shared:
+        assert 'carrot' in shared
+        assert 'kale' not in shared
+        for plant in names:
+            assert shared.get_size(plant) == library.get_size(plant)
+            assert shared.get_height(plant) == library.get_height(plant)
+            assert shared.get_seeds_per_square(plant) == \
+                library.get_seeds_per_square(plant)
+            assert shared.get_enemies(plant) == library.get_enemies(plant)
+
+        # Companions outside the catalogue aren't kept
+        assert shared.get_companions('carrot') == ['onion']
+
+        assert shared.get_trellised(names) == library.get_trellised(names)
+        assert shared.get_large_plants(names) == \
+            library.get_large_plants(names)
+        assert np.array_equal(shared.get_relation_matrix(names),
+                              library.get_relation_matrix(names))
+
+
+def test_workers_attach(make_library):
+    with SharedPlantLibrary.create(make_library(PLANTS)) as shared:
+        attached = pickle.loads(pickle.dumps(shared))
+        assert not attached.owner
+        assert attached.get_size('squash') == (2, 2)
+        attached.close()
+
+        with ProcessPoolExecutor(1) as pool:
+            assert pool.submit(get_enemies, shared).result() == ['bean']
+
+
+def test_independent_process(make_library):
+    # A process outside the pool has its own resource tracker, which
+    # mustn't remove the block when the process exits
+    script = """
+import sys
+sys.path.append(sys.argv[1])
+from shared_library import SharedPlantLibrary
+shared = SharedPlantLibrary.attach(sys.argv[2])
+print(shared.get_size('squash'))
+shared.close()
+"""
+    with SharedPlantLibrary.create(make_library(PLANTS)) as shared:
+        process = subprocess.run(
+            [sys.executable, '-c', script,
+             os.path.dirname(shared_library.__file__), shared.shm.name],
+            capture_output=True, text=True, check=True)
+        assert process.stdout.strip() == '(2, 2)'
+        assert process.stderr == ''
+
+        assert shared.get_size('squash') == (2, 2)
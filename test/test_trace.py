@@ -0,0 +1,82 @@
+import pytest
+from planner.garden import Garden
+from planner.trace import PHASES, PlacementTrace
+
+
+PLANTS = {
+    'carrot': {'companion': ['onion']},
+    'onion': {},
+    'squash': {'size_north': 2, 'size_west': 2, 'height': 'tall'},
+    'bean': {'trellis': True, 'size_north': 1, 'size_west': 4},
+    'marigold': {},
+    'nasturtium': {},
+}
+
+
+def get_squares(garden):
+    return [[box.squares for box in row] for row in garden.boxes]
+
+
+def test_ring_buffer(make_library):
+    trace = PlacementTrace(2)
+    for i in range(3):
+        trace.record('single', 'carrot', 0, (i, 0), (1, 1), (4, 2, 1, 1, -1))
+
+    assert len(trace) == 2
+    assert trace.get_dropped() == 1
+    assert list(trace.get_records()['row']) == [1, 2]
+    assert trace.get_records()[0]['tied'] == 2
+    with pytest.raises(ValueError):
+        trace.replay(Garden(make_library(PLANTS), 1, 1))
+
+
+def test_replay(tmp_path, make_library):
+    library = make_library(PLANTS)
+    garden = Garden(library, 2, 2)
+    garden.trace = PlacementTrace()
+    garden.generate({'carrot': 20, 'onion': 10, 'squash': 8, 'bean': 8})
+
+    records = garden.trace.get_records()
+    assert len(records) == garden.trace.count
+    assert PHASES[records[0]['phase']] == 'trellised'
+    assert all(record['candidates'] > record['draw'] and
+               record['candidates'] >= record['tied'] > 0
+               for record in records
+               if PHASES[record['phase']] in ('large', 'single'))
+
+    filename = str(tmp_path / 'trace.npz')
+    garden.trace.save(filename)
+    trace = PlacementTrace.load(filename)
+    assert trace.shape == (2, 2)
+
+    replayed = Garden(library, *trace.shape)
+    trace.replay(replayed)
+    assert get_squares(replayed) == get_squares(garden)
+    assert replayed.score() == garden.score()
+
+
+def test_replay_rollback(make_library):
+    library = make_library(PLANTS)
+    garden = Garden(library, 1, 1)
+    garden.trace = PlacementTrace()
+    garden.generate({'carrot': 4})
+
+    checkpoint = garden.checkpoint()
+    garden.place_best(garden.boxes[0][0], 'carrot', (1, 1),
+                      garden.boxes[0][0].check_fit(1, 1))
+    garden.rollback(checkpoint)
+
+    replayed = Garden(library, 1, 1)
+    garden.trace.replay(replayed)
+    assert get_squares(replayed) == get_squares(garden)
+
+
+def test_replay_shape(make_library):
+    library = make_library(PLANTS)
+    garden = Garden(library, 1, 2)
+    garden.trace = PlacementTrace()
+    garden.generate({'carrot': 4})
+    assert garden.trace.shape == (1, 2)
+
+    with pytest.raises(ValueError):
+        garden.trace.replay(Garden(library, 2, 1))